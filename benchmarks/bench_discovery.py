@@ -0,0 +1,56 @@
+"""Benchmark gateway discovery against local fake gateways.
+
+Fake gateways listen on a few loopback addresses and the discovery scan
+probes the whole 127.0.0.0/24 for them, like it probes the local network
+from the config flow.
+
+    python benchmarks/bench_discovery.py --gateways 3
+"""
+
+import argparse
+import asyncio
+import importlib
+import time
+
+from bench_send import PACKAGE, load_integration
+from fake_gateway import FakeGateway
+
+
+async def run(args):
+    discovery = importlib.import_module(f"{PACKAGE}.discovery")
+
+    gateways = [await FakeGateway(f"127.0.0.{index + 1}", args.port).start() for index in range(args.gateways)]
+    port = gateways[0].port
+    for gateway in gateways[1:]:
+        if gateway.port != port:
+            raise SystemExit("--port 0 needs a single gateway, pass a fixed port for more")
+
+    hosts = discovery.subnet_hosts("127.0.0.1", 8)
+    started = time.perf_counter()
+    found = await discovery.async_discover(hosts, port, args.timeout, args.concurrency)
+    elapsed = time.perf_counter() - started
+
+    for gateway in gateways:
+        await gateway.stop()
+
+    expected = [gateway.host for gateway in gateways]
+    print(f"hosts probed        {len(hosts)}")
+    print(f"elapsed             {elapsed:.3f} s")
+    print(f"found               {', '.join(found) or '-'}")
+    print(f"missed              {', '.join(host for host in expected if host not in found) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gateways", type=int, default=3)
+    parser.add_argument("--port", type=int, default=18899, help="port of the fake gateways, 0 picks a free one")
+    parser.add_argument("--timeout", type=float, default=0.5, help="seconds to wait for a single host")
+    parser.add_argument("--concurrency", type=int, default=64, help="hosts probed at the same time")
+    args = parser.parse_args()
+
+    load_integration()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
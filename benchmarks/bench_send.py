@@ -0,0 +1,147 @@
+"""Benchmark the Iluminize send path against local fake gateways.
+
+Simulated controllers (or light entities, if Home Assistant is installed)
+send distinct RGB commands in a closed loop while fake gateways record
+when each packet arrives. Reports commands per second, command-to-wire
+latency percentiles, connections opened and bytes on the wire per command.
+
+    python benchmarks/bench_send.py --gateways 4 --controllers 8 --commands 500
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import sys
+import time
+import types
+
+from fake_gateway import FakeGateway
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "custom_components.iluminize"
+
+
+def load_integration():
+    """Import the integration package, returns whether the light entities are usable.
+
+    Without Home Assistant the package ``__init__`` cannot be imported, so
+    only its Home Assistant independent modules are loaded.
+    """
+    sys.path.insert(0, ROOT)
+    try:
+        importlib.import_module(f"{PACKAGE}.light")
+        return True
+    except ImportError:
+        for name in list(sys.modules):
+            if name == PACKAGE or name.startswith(f"{PACKAGE}."):
+                del sys.modules[name]
+        parent = types.ModuleType("custom_components")
+        parent.__path__ = [os.path.join(ROOT, "custom_components")]
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [os.path.join(ROOT, "custom_components", "iluminize")]
+        sys.modules["custom_components"] = parent
+        sys.modules[PACKAGE] = package
+        return False
+
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(args):
+    controller_module = importlib.import_module(f"{PACKAGE}.controller")
+    light_module = importlib.import_module(f"{PACKAGE}.light") if args.entities else None
+    calibration_module = importlib.import_module(f"{PACKAGE}.calibration")
+
+    gateways = [
+        await FakeGateway(latency=args.latency, drop_rate=args.drop_rate, reset_rate=args.reset_rate, seed=index).start()
+        for index in range(args.gateways)
+    ]
+
+    submitted = {}
+    latencies = []
+
+    def on_packet(packet, arrival):
+        # redundant copies of a command do not count
+        started = submitted.pop(packet, None)
+        if started is not None:
+            latencies.append(arrival - started)
+
+    hub = controller_module.IluminizeTransportHub()
+    senders = []
+    for gateway in gateways:
+        gateway.add_listener(on_packet)
+        for index in range(args.controllers):
+            controller = controller_module.IluminizeController(
+                hub.acquire(gateway.host, gateway.port, redundancy=args.redundancy, repeat_delay=args.repeat_delay / 1000),
+                f"{len(senders):06x}", max_rate=args.max_rate
+            )
+            if light_module is not None:
+                entity = light_module.IluminizeRGBLight("Bench", controller, calibration_module.IluminizeCalibration(), 20)
+                senders.append((controller, entity))
+            else:
+                senders.append((controller, None))
+
+    async def drive(controller, entity):
+        for index in range(args.commands):
+            rgb = (index & 0xff, (index >> 8) & 0xff, 0x80)
+            if entity is not None:
+                output = entity._rgb_output(rgb, 255)
+                submitted[controller.encoder.encode_rgb(*output)] = time.perf_counter()
+                await entity._async_set_output(output)
+            else:
+                submitted[controller.encoder.encode_rgb(*rgb)] = time.perf_counter()
+                await controller.queue_rgb(*rgb)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(drive(controller, entity) for (controller, entity) in senders))
+    elapsed = time.perf_counter() - started
+    # let the last packets and repeats reach the fake gateways
+    await asyncio.sleep(max(0.05, args.latency * 2) + args.repeat_delay / 1000)
+
+    for (controller, _) in senders:
+        controller.close()
+        hub.release(controller.gateway)
+    for gateway in gateways:
+        await gateway.stop()
+
+    commands = len(senders) * args.commands
+    wire_bytes = sum(gateway.bytes_received for gateway in gateways)
+    print(f"mode                {'entities' if light_module is not None else 'controllers'}")
+    print(f"commands            {commands}")
+    print(f"commands/sec        {commands / elapsed:.0f}")
+    print(f"latency p50         {percentile(latencies, 0.5) * 1000:.3f} ms")
+    print(f"latency p99         {percentile(latencies, 0.99) * 1000:.3f} ms")
+    print(f"connections opened  {sum(gateway.connections for gateway in gateways)}")
+    print(f"bytes per command   {wire_bytes / commands:.1f}")
+    print(f"lost                {len(submitted)}")
+    print(f"invalid packets     {sum(gateway.invalid for gateway in gateways)}")
+    print(f"injected drops      {sum(gateway.dropped for gateway in gateways)}")
+    print(f"injected resets     {sum(gateway.resets for gateway in gateways)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gateways", type=int, default=4)
+    parser.add_argument("--controllers", type=int, default=8, help="controllers per gateway")
+    parser.add_argument("--commands", type=int, default=200, help="commands per controller")
+    parser.add_argument("--max-rate", type=float, default=1000, help="commands per second per controller")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--reset-rate", type=float, default=0.0)
+    parser.add_argument("--redundancy", choices=["single", "duplicate", "repeat"], default="duplicate")
+    parser.add_argument("--repeat-delay", type=float, default=50, help="milliseconds before the spaced repeat")
+    parser.add_argument("--entities", action="store_true", help="drive the light entities instead of the controllers")
+    args = parser.parse_args()
+
+    if not load_integration() and args.entities:
+        parser.error("--entities needs Home Assistant to be installed")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark the frame stream input against local fake gateways.
+
+A sender streams RGB frames for every target over UDP at a fixed rate,
+the stream input feeds them to the controllers, which send them to fake
+gateways. Reports frames received, commands that reached the wire, frames
+dropped in favour of newer ones and frame-to-wire latency.
+
+    python benchmarks/bench_stream.py --targets 16 --fps 200 --seconds 2
+"""
+
+import argparse
+import asyncio
+import importlib
+import socket
+import time
+
+from bench_send import PACKAGE, load_integration, percentile
+from fake_gateway import FakeGateway
+
+
+async def run(args):
+    controller_module = importlib.import_module(f"{PACKAGE}.controller")
+    stream_module = importlib.import_module(f"{PACKAGE}.stream")
+
+    gateways = [await FakeGateway().start() for _ in range(args.gateways)]
+    hub = controller_module.IluminizeTransportHub()
+    controllers = [
+        controller_module.IluminizeController(
+            hub.acquire(gateways[index % len(gateways)].host, gateways[index % len(gateways)].port),
+            f"{index:06x}", max_rate=args.max_rate,
+        )
+        for index in range(args.targets)
+    ]
+
+    submitted = {}
+    latencies = []
+
+    def on_packet(packet, arrival):
+        started = submitted.pop(packet, None)
+        if started is not None:
+            latencies.append(arrival - started)
+
+    for gateway in gateways:
+        gateway.add_listener(on_packet)
+
+    def send(index, red, green, blue):
+        controller = controllers[index]
+        submitted[controller.encoder.encode_rgb(red, green, blue)] = time.perf_counter()
+        controller.queue_rgb(red, green, blue, priority=controller_module.PRIORITY_BACKGROUND)
+
+    protocol = await stream_module.async_start_stream("127.0.0.1", 0, len(controllers), send)
+    port = protocol.address[1]
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    loop = asyncio.get_running_loop()
+    frame_count = int(args.fps * args.seconds)
+    started = loop.time()
+    for frame in range(frame_count):
+        color = bytes(((frame + index) & 0xff for index in range(3)))
+        sock.sendto(color * len(controllers), ("127.0.0.1", port))
+        await asyncio.sleep(max(0, started + (frame + 1) / args.fps - loop.time()))
+    await asyncio.sleep(0.2)
+
+    sock.close()
+    protocol.close()
+    for controller in controllers:
+        controller.close()
+        hub.release(controller.gateway)
+    for gateway in gateways:
+        await gateway.stop()
+
+    sent = sum(controller.metrics.commands_sent for controller in controllers)
+    print(f"frames sent         {frame_count}")
+    print(f"frames received     {protocol.frames}")
+    print(f"commands on wire    {sent}")
+    print(f"superseded          {sum(controller.coalesced for controller in controllers)}")
+    print(f"latency p50         {percentile(latencies, 0.5) * 1000:.3f} ms")
+    print(f"latency p99         {percentile(latencies, 0.99) * 1000:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gateways", type=int, default=2)
+    parser.add_argument("--targets", type=int, default=16)
+    parser.add_argument("--fps", type=float, default=200, help="frames per second sent to the stream input")
+    parser.add_argument("--seconds", type=float, default=2)
+    parser.add_argument("--max-rate", type=float, default=50, help="commands per second per controller")
+    args = parser.parse_args()
+
+    load_integration()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
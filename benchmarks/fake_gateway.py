@@ -0,0 +1,137 @@
+"""Local stand-in for an Iluminize WiFi gateway.
+
+The fake gateway accepts TCP connections, splits the stream into 12 byte
+packets (``55 d1 d2 d3 c1 c2 v1 v2 v3 cs aa aa``), validates framing and
+checksum and records every packet with its arrival time. Latency, dropped
+packets and connection resets can be injected to exercise the send path.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+PACKET_LENGTH = 12
+
+
+def checksum_valid(packet):
+    """Return whether the packet is framed correctly and carries the right checksum."""
+    return (
+        len(packet) == PACKET_LENGTH
+        and packet[0] == 0x55
+        and packet[10] == 0xaa
+        and packet[11] == 0xaa
+        and sum(packet[4:9]) & 0xff == packet[9]
+    )
+
+
+class FakeGateway(object):
+    """Fake Iluminize gateway listening on a local port."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, drop_rate=0.0, reset_rate=0.0, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.reset_rate = reset_rate
+        self.packets = []
+        self.invalid = 0
+        self.dropped = 0
+        self.resets = 0
+        self.connections = 0
+        self.bytes_received = 0
+        self._random = random.Random(seed)
+        self._server = None
+        self._listeners = []
+        self._handlers = {}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for writer in self._handlers.values():
+            writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    def add_listener(self, listener):
+        """Call ``listener(packet, arrival)`` for every valid packet."""
+        self._listeners.append(listener)
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._handlers[asyncio.current_task()] = writer
+        buffer = b""
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                arrival = time.perf_counter()
+                self.bytes_received += len(data)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                buffer += data
+                while len(buffer) >= PACKET_LENGTH:
+                    if buffer[0] != 0x55:
+                        # resynchronise on the next start byte
+                        self.invalid += 1
+                        start = buffer.find(b"\x55", 1)
+                        buffer = buffer[start:] if start >= 0 else b""
+                        continue
+                    packet = buffer[:PACKET_LENGTH]
+                    buffer = buffer[PACKET_LENGTH:]
+                    if not checksum_valid(packet):
+                        self.invalid += 1
+                        continue
+                    if self.drop_rate and self._random.random() < self.drop_rate:
+                        self.dropped += 1
+                        continue
+                    self.packets.append((arrival, packet))
+                    for listener in self._listeners:
+                        listener(packet, arrival)
+                if self.reset_rate and self._random.random() < self.reset_rate:
+                    self.resets += 1
+                    transport = writer.transport
+                    transport.abort()
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            del self._handlers[asyncio.current_task()]
+            writer.close()
+
+
+async def _serve(args):
+    gateway = await FakeGateway(args.host, args.port, args.latency, args.drop_rate, args.reset_rate).start()
+    print(f"Fake Iluminize gateway listening on {gateway.host}:{gateway.port}")
+
+    def log(packet, arrival):
+        print(f"{arrival:.6f} {packet.hex()}")
+
+    gateway.add_listener(log)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await gateway.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added before processing a read")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="probability of discarding a packet")
+    parser.add_argument("--reset-rate", type=float, default=0.0, help="probability of resetting after a read")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
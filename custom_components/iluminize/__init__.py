@@ -1,22 +1,150 @@
 """The Iluminize component."""
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant import config_entries
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.reload import async_integration_yaml_config
+from homeassistant.helpers.start import async_at_started
+from homeassistant.const import CONF_HOST, CONF_PORT, EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
 
-from .const import PLATFORMS
+from .const import DOMAIN, LOGGER, PLATFORMS, DATA_HUB, DATA_ENTITIES, DATA_STREAM, DATA_RESYNC, ATTR_TARGETS, CONF_STREAM, CONF_STREAM_HOST_DEFAULT, CONF_STREAM_PORT_DEFAULT, CONF_SENDER, CONF_PORT_DEFAULT, CONF_MAX_RATE, CONF_MAX_RATE_DEFAULT, CONF_CONNECT_TIMEOUT, CONF_CONNECT_TIMEOUT_DEFAULT, CONF_SEND_TIMEOUT, CONF_SEND_TIMEOUT_DEFAULT, CONF_KEEPALIVE, CONF_GATEWAY_MAX_RATE, CONF_GATEWAY_MAX_RATE_DEFAULT, CONF_MAX_CONCURRENCY, CONF_MAX_CONCURRENCY_DEFAULT, CONF_REDUNDANCY, CONF_REDUNDANCY_DUPLICATE, CONF_REPEAT_DELAY, CONF_REPEAT_DELAY_DEFAULT
+from .controller import IluminizeController, IluminizeTransportHub
+from .provisioning import async_import_lights
+from .resync import IluminizeResync
+from .schema import LightSchema
+from .services import async_setup_services
+from .stream import async_start_stream
+
+CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(DOMAIN): vol.Schema(
+            {
+                vol.Optional(CONF_MAX_CONCURRENCY, default=CONF_MAX_CONCURRENCY_DEFAULT): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Optional(CONF_MAX_RATE): vol.All(vol.Coerce(float), vol.Range(min=1)),
+                vol.Optional(CONF_STREAM): vol.Schema(
+                    {
+                        vol.Optional(CONF_HOST, default=CONF_STREAM_HOST_DEFAULT): cv.string,
+                        vol.Optional(CONF_PORT, default=CONF_STREAM_PORT_DEFAULT): cv.port,
+                        vol.Required(ATTR_TARGETS): cv.entity_ids,
+                    }
+                ),
+                **LightSchema.platform_node(),
+            }
+        ),
+    },
+    extra=vol.ALLOW_EXTRA,
+)
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the Iluminize component."""
+    conf = config.get(DOMAIN, {})
+    data = hass.data.setdefault(DOMAIN, {})
+    # one hub for the whole installation, so limits hold across all gateways
+    data[DATA_HUB] = IluminizeTransportHub(conf.get(CONF_MAX_CONCURRENCY, CONF_MAX_CONCURRENCY_DEFAULT), conf.get(CONF_MAX_RATE))
+    data[DATA_ENTITIES] = {}
+    data[DATA_RESYNC] = IluminizeResync(hass)
+    async_setup_services(hass)
+
+    @callback
+    def resync_at_start(hass: HomeAssistant) -> None:
+        # the hardware may have lost its state while Home Assistant was down
+        for entity in data[DATA_ENTITIES].values():
+            if entity.resync:
+                data[DATA_RESYNC].request(entity)
+
+    async_at_started(hass, resync_at_start)
+
+    if conf.get(Platform.LIGHT):
+        hass.async_create_task(async_import_lights(hass, conf[Platform.LIGHT]))
+    if conf.get(CONF_STREAM):
+        await _async_setup_stream(hass, conf[CONF_STREAM])
+    return True
+
+async def _async_setup_stream(hass: HomeAssistant, conf: ConfigType) -> None:
+    """Feed frames received on the stream port straight to the target lights."""
+    entities = hass.data[DOMAIN][DATA_ENTITIES]
+    targets = conf[ATTR_TARGETS]
+
+    def send(index: int, red: int, green: int, blue: int) -> None:
+        entity = entities.get(targets[index])
+        if entity is not None:
+            entity.stream_rgb((red, green, blue))
+
+    try:
+        protocol = await async_start_stream(conf[CONF_HOST], conf[CONF_PORT], len(targets), send)
+    except OSError as err:
+        LOGGER.error("Cannot listen for frames on port %s: %s", conf[CONF_PORT], err)
+        return
+
+    hass.data[DOMAIN][DATA_STREAM] = protocol
+
+    def stop_stream(event: Event) -> None:
+        protocol.close()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stop_stream)
+
+async def async_migrate_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
+    """Migrate old config entries."""
+    if config_entry.version == 1:
+        # version 2 identifies devices by sender as well, so a gateway can host several of them
+        host = config_entry.data.get(CONF_HOST)
+        port = config_entry.data.get(CONF_PORT, CONF_PORT_DEFAULT)
+        sender = config_entry.data.get(CONF_SENDER).lower()
+        old_prefix = f"{DOMAIN}_{host}_{port}_"
+        new_prefix = f"{DOMAIN}_{host}_{port}_{sender}_"
+
+        def migrate_unique_id(entity_entry: er.RegistryEntry) -> dict | None:
+            if entity_entry.unique_id.startswith(new_prefix) or not entity_entry.unique_id.startswith(old_prefix):
+                return None
+            return {"new_unique_id": new_prefix + entity_entry.unique_id[len(old_prefix):]}
+
+        await er.async_migrate_entries(hass, config_entry.entry_id, migrate_unique_id)
+
+        device_registry = dr.async_get(hass)
+        for device in dr.async_entries_for_config_entry(device_registry, config_entry.entry_id):
+            if (DOMAIN, f"{host}:{port}") in device.identifiers:
+                device_registry.async_update_device(device.id, new_identifiers={(DOMAIN, f"{host}:{port}:{sender}")})
+
+        hass.config_entries.async_update_entry(config_entry, unique_id=f"{host}:{port}:{sender}", version=2)
+        LOGGER.debug("Migrated config entry %s to version 2", config_entry.entry_id)
+
     return True
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Set up Iluminize component for the given entry."""
+    host = config_entry.data.get(CONF_HOST)
+    port = config_entry.data.get(CONF_PORT, CONF_PORT_DEFAULT)
+    sender = config_entry.data.get(CONF_SENDER)
+    max_rate = config_entry.options.get(CONF_MAX_RATE, CONF_MAX_RATE_DEFAULT)
+    connect_timeout = config_entry.options.get(CONF_CONNECT_TIMEOUT, CONF_CONNECT_TIMEOUT_DEFAULT)
+    send_timeout = config_entry.options.get(CONF_SEND_TIMEOUT, CONF_SEND_TIMEOUT_DEFAULT)
+    keepalive = config_entry.options.get(CONF_KEEPALIVE, True)
+    gateway_max_rate = config_entry.options.get(CONF_GATEWAY_MAX_RATE, CONF_GATEWAY_MAX_RATE_DEFAULT)
+    redundancy = config_entry.options.get(CONF_REDUNDANCY, CONF_REDUNDANCY_DUPLICATE)
+    repeat_delay = config_entry.options.get(CONF_REPEAT_DELAY, CONF_REPEAT_DELAY_DEFAULT) / 1000
+
+    hub = hass.data[DOMAIN][DATA_HUB]
+    gateway = hub.acquire(host, port, connect_timeout, send_timeout, keepalive, gateway_max_rate, redundancy, repeat_delay,
+                          owner=config_entry.unique_id)
+    controller = IluminizeController(gateway, sender, max_rate=max_rate)
+    hass.data[DOMAIN][config_entry.entry_id] = controller
+
+    def release_controller() -> None:
+        hass.data[DOMAIN].pop(config_entry.entry_id, None)
+        controller.close()
+        hub.release(controller.gateway, owner=config_entry.unique_id)
+
+    config_entry.async_on_unload(release_controller)
     config_entry.async_on_unload(config_entry.add_update_listener(options_update_listener))
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
 
+    # connect in the background, so the first command does not pay for it
+    config_entry.async_create_background_task(hass, gateway.async_warm(), f"{DOMAIN} warm {host}:{port}")
+
     return True
 
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
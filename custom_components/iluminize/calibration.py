@@ -0,0 +1,87 @@
+"""Output calibration for Iluminize WiFi LED Controller."""
+
+import math
+
+IDENTITY_WHITE_BALANCE = (1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0)
+
+# _DIM[brightness << 8 | value] is value scaled by brightness / 255
+_DIM = bytes(round(value * brightness / 255) for brightness in range(256) for value in range(256))
+
+# matrix contributions are kept as fixed point with this many fractional bits
+_FRACTION_BITS = 4
+
+# a coefficient beyond this saturates its channel from the faintest input
+_MAX_WHITE_BALANCE = 16.0
+
+
+def parse_white_balance(value):
+    """Parse a white balance matrix given as nine comma separated numbers, row by row."""
+    matrix = tuple(float(part) for part in value.replace(";", ",").split(","))
+    if len(matrix) != 9:
+        raise ValueError("White balance matrix needs nine values")
+    if not all(math.isfinite(factor) and abs(factor) <= _MAX_WHITE_BALANCE for factor in matrix):
+        raise ValueError(f"White balance values must be numbers between -{_MAX_WHITE_BALANCE:g} and {_MAX_WHITE_BALANCE:g}")
+    return matrix
+
+
+class IluminizeCalibration(object):
+    """Lookup tables mapping Home Assistant colors and brightness to output bytes.
+
+    Each channel gets a 256 entry table combining the gamma curve with the
+    channel maximum, so applying a color is a handful of table lookups. A
+    white balance matrix other than the identity is folded into one table
+    per pair of input and output channel.
+    """
+
+    def __init__(self, max_rgb="FFFFFF", max_w="FF", gamma=1.0, white_balance=IDENTITY_WHITE_BALANCE):
+        maxima = bytes.fromhex(max_rgb)
+        curve = [(value / 255) ** gamma for value in range(256)]
+
+        self.max_rgb = max_rgb
+        self.max_w = max_w
+        self.gamma = gamma
+        self.white_balance = tuple(white_balance)
+
+        self._white_table = _table(int(max_w, 16), curve)
+        if self.white_balance == IDENTITY_WHITE_BALANCE:
+            self._rgb_tables = tuple(_table(maximum, curve) for maximum in maxima)
+            self._matrix = None
+        else:
+            scale = 1 << _FRACTION_BITS
+            self._rgb_tables = None
+            self._matrix = tuple(
+                tuple(
+                    [round(maximum * self.white_balance[row * 3 + column] * value * scale) for value in curve]
+                    for column in range(3)
+                )
+                for (row, maximum) in enumerate(maxima)
+            )
+
+    def rgb(self, red, green, blue, brightness=255):
+        """Return the output bytes for an RGB color at the given brightness."""
+        base = brightness << 8
+        red = _DIM[base | red]
+        green = _DIM[base | green]
+        blue = _DIM[base | blue]
+
+        if self._matrix is None:
+            (red_table, green_table, blue_table) = self._rgb_tables
+            return (red_table[red], green_table[green], blue_table[blue])
+
+        half = 1 << (_FRACTION_BITS - 1)
+        return tuple(
+            min(255, max(0, (red_row[red] + green_row[green] + blue_row[blue] + half) >> _FRACTION_BITS))
+            for (red_row, green_row, blue_row) in self._matrix
+        )
+
+    def white(self, brightness):
+        """Return the output byte for the white channel at the given brightness."""
+        return self._white_table[brightness]
+
+    def rgbw(self, red, green, blue, white, brightness=255):
+        """Return the output bytes for an RGBW color at the given brightness."""
+        return self.rgb(red, green, blue, brightness) + (self._white_table[_DIM[brightness << 8 | white]],)
+
+
+def _table(maximum, curve):
+    return bytes(min(255, round(maximum * value)) for value in curve)
@@ -0,0 +1,69 @@
+"""Memoized color conversions for Iluminize WiFi LED Controller."""
+
+from functools import lru_cache
+
+import homeassistant.util.color as color_util
+
+# inputs are quantized before the lookup, finer steps are not visible on the strips
+_CACHE_SIZE = 1024
+_HS_STEPS = 10
+_XY_STEPS = 10000
+_KELVIN_STEP = 10
+
+MIN_COLOR_TEMP_KELVIN = 2000
+MAX_COLOR_TEMP_KELVIN = 6500
+
+
+def hs_to_rgb(hs_color):
+    """Return the RGB color of a hue and saturation."""
+    (hue, saturation) = hs_color
+    return _hs_to_rgb(round(hue * _HS_STEPS) % (360 * _HS_STEPS), round(saturation * _HS_STEPS))
+
+
+def xy_to_rgb(xy_color):
+    """Return the RGB color of a CIE xy color at full brightness."""
+    (x, y) = xy_color
+    return _xy_to_rgb(round(x * _XY_STEPS), round(y * _XY_STEPS))
+
+
+def kelvin_to_rgb(kelvin):
+    """Return the RGB color of a color temperature."""
+    return _kelvin_to_rgb(_quantize_kelvin(kelvin))
+
+
+def kelvin_to_rgbw(kelvin):
+    """Return the RGBW color of a color temperature, the white channel carrying the common part."""
+    return _kelvin_to_rgbw(_quantize_kelvin(kelvin))
+
+
+def cache_info():
+    """Return the hits and misses of the conversion caches."""
+    return {
+        name: function.cache_info()._asdict()
+        for (name, function) in (("hs", _hs_to_rgb), ("xy", _xy_to_rgb), ("kelvin", _kelvin_to_rgb), ("kelvin_rgbw", _kelvin_to_rgbw))
+    }
+
+
+def _quantize_kelvin(kelvin):
+    kelvin = min(MAX_COLOR_TEMP_KELVIN, max(MIN_COLOR_TEMP_KELVIN, kelvin))
+    return round(kelvin / _KELVIN_STEP) * _KELVIN_STEP
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _hs_to_rgb(hue, saturation):
+    return color_util.color_hs_to_RGB(hue / _HS_STEPS, saturation / _HS_STEPS)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _xy_to_rgb(x, y):
+    return color_util.color_xy_to_RGB(x / _XY_STEPS, y / _XY_STEPS)
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _kelvin_to_rgb(kelvin):
+    return tuple(round(value) for value in color_util.color_temperature_to_rgb(kelvin))
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _kelvin_to_rgbw(kelvin):
+    return color_util.color_rgb_to_rgbw(*_kelvin_to_rgb(kelvin))
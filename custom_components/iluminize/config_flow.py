@@ -4,15 +4,20 @@ import voluptuous as vol
 from typing import Any
 
 from homeassistant import config_entries
+from homeassistant.components import network
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.selector import SelectSelector, SelectSelectorConfig, SelectSelectorMode
 
+import ipaddress
 import re
+import time
 
-from .const import DOMAIN, LOGGER, CONF_SENDER, CONF_SENDER_REGEX, CONF_TYPE, CONF_TYPE_RGBW, CONF_TYPE_RGB, CONF_TYPE_W, CONF_NAME_DEFAULT, CONF_PORT_DEFAULT, CONF_MAX_RGB, CONF_MAX_W, CONF_MAX_RGB_DEFAULT, CONF_MAX_W_DEFAULT, CONF_MAX_RGB_REGEX, CONF_MAX_W_REGEX
+from .const import DOMAIN, LOGGER, DISCOVERY_MANUAL, CONF_SENDER, CONF_SENDER_REGEX, CONF_TYPE, CONF_TYPE_RGBW, CONF_TYPE_RGB, CONF_TYPE_W, CONF_NAME_DEFAULT, CONF_PORT_DEFAULT, CONF_MAX_RGB, CONF_MAX_W, CONF_MAX_RGB_DEFAULT, CONF_MAX_W_DEFAULT, CONF_MAX_RGB_REGEX, CONF_MAX_W_REGEX, CONF_MAX_RATE, CONF_MAX_RATE_DEFAULT, CONF_TRANSITION_FPS, CONF_TRANSITION_FPS_DEFAULT, CONF_TRACE, CONF_GAMMA, CONF_GAMMA_DEFAULT, CONF_WHITE_BALANCE, CONF_WHITE_BALANCE_DEFAULT, CONF_UNIFIED_RGBW, CONF_CONNECT_TIMEOUT, CONF_CONNECT_TIMEOUT_DEFAULT, CONF_SEND_TIMEOUT, CONF_SEND_TIMEOUT_DEFAULT, CONF_KEEPALIVE, CONF_RESYNC, CONF_GATEWAY_MAX_RATE, CONF_GATEWAY_MAX_RATE_DEFAULT, CONF_REDUNDANCY, CONF_REDUNDANCY_SINGLE, CONF_REDUNDANCY_DUPLICATE, CONF_REDUNDANCY_REPEAT, CONF_REPEAT_DELAY, CONF_REPEAT_DELAY_DEFAULT
+from .calibration import parse_white_balance
+from .discovery import async_discover, subnet_hosts
 
 
 class OptionsFlowHandler(config_entries.OptionsFlow):
@@ -34,19 +39,40 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 return self.async_create_entry(title="", data=user_input)
         
         type = self.config_entry.data.get(CONF_TYPE)
+        # start from the saved options, so saving the form keeps the ones not changed
+        options = {**self.config_entry.options, **(user_input or {})}
         if type == CONF_TYPE_W:
             data_schema = vol.Schema({
-                vol.Optional(CONF_MAX_W, default=CONF_MAX_W_DEFAULT): cv.string,
+                vol.Optional(CONF_MAX_W, default=options.get(CONF_MAX_W, CONF_MAX_W_DEFAULT)): cv.string,
             })
         elif type == CONF_TYPE_RGB:
             data_schema = vol.Schema({
-                vol.Optional(CONF_MAX_RGB, default=CONF_MAX_RGB_DEFAULT): cv.string,
+                vol.Optional(CONF_MAX_RGB, default=options.get(CONF_MAX_RGB, CONF_MAX_RGB_DEFAULT)): cv.string,
+                vol.Optional(CONF_WHITE_BALANCE, default=options.get(CONF_WHITE_BALANCE, CONF_WHITE_BALANCE_DEFAULT)): cv.string,
             })
         else:
             data_schema = vol.Schema({
-                vol.Optional(CONF_MAX_RGB, default=CONF_MAX_RGB_DEFAULT): cv.string,
-                vol.Optional(CONF_MAX_W, default=CONF_MAX_W_DEFAULT): cv.string,
+                vol.Optional(CONF_MAX_RGB, default=options.get(CONF_MAX_RGB, CONF_MAX_RGB_DEFAULT)): cv.string,
+                vol.Optional(CONF_MAX_W, default=options.get(CONF_MAX_W, CONF_MAX_W_DEFAULT)): cv.string,
+                vol.Optional(CONF_WHITE_BALANCE, default=options.get(CONF_WHITE_BALANCE, CONF_WHITE_BALANCE_DEFAULT)): cv.string,
+                vol.Optional(CONF_UNIFIED_RGBW, default=options.get(CONF_UNIFIED_RGBW, False)): cv.boolean,
             })
+        data_schema = data_schema.extend({
+            vol.Optional(CONF_GAMMA, default=options.get(CONF_GAMMA, CONF_GAMMA_DEFAULT)): vol.All(vol.Coerce(float), vol.Range(min=0.5, max=3.0)),
+            vol.Optional(CONF_MAX_RATE, default=options.get(CONF_MAX_RATE, CONF_MAX_RATE_DEFAULT)): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+            vol.Optional(CONF_GATEWAY_MAX_RATE, default=options.get(CONF_GATEWAY_MAX_RATE, CONF_GATEWAY_MAX_RATE_DEFAULT)): vol.All(vol.Coerce(int), vol.Range(min=0, max=1000)),
+            vol.Optional(CONF_REDUNDANCY, default=options.get(CONF_REDUNDANCY, CONF_REDUNDANCY_DUPLICATE)): SelectSelector(
+                SelectSelectorConfig(options=[CONF_REDUNDANCY_SINGLE, CONF_REDUNDANCY_DUPLICATE, CONF_REDUNDANCY_REPEAT],
+                                     mode=SelectSelectorMode.DROPDOWN),
+                ),
+            vol.Optional(CONF_REPEAT_DELAY, default=options.get(CONF_REPEAT_DELAY, CONF_REPEAT_DELAY_DEFAULT)): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
+            vol.Optional(CONF_TRANSITION_FPS, default=options.get(CONF_TRANSITION_FPS, CONF_TRANSITION_FPS_DEFAULT)): vol.All(vol.Coerce(int), vol.Range(min=1, max=50)),
+            vol.Optional(CONF_CONNECT_TIMEOUT, default=options.get(CONF_CONNECT_TIMEOUT, CONF_CONNECT_TIMEOUT_DEFAULT)): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=30)),
+            vol.Optional(CONF_SEND_TIMEOUT, default=options.get(CONF_SEND_TIMEOUT, CONF_SEND_TIMEOUT_DEFAULT)): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=30)),
+            vol.Optional(CONF_KEEPALIVE, default=options.get(CONF_KEEPALIVE, True)): cv.boolean,
+            vol.Optional(CONF_RESYNC, default=options.get(CONF_RESYNC, False)): cv.boolean,
+            vol.Optional(CONF_TRACE, default=options.get(CONF_TRACE, False)): cv.boolean,
+        })
         
         return self.async_show_form(
             step_id="init",
@@ -65,10 +91,21 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         else:
             errors.pop(CONF_MAX_W, None)
 
+        try:
+            if user_input.get(CONF_WHITE_BALANCE, None) is not None:
+                parse_white_balance(user_input[CONF_WHITE_BALANCE])
+            errors.pop(CONF_WHITE_BALANCE, None)
+        except ValueError:
+            errors[CONF_WHITE_BALANCE] = "invalid_white_balance_format"
+
 class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle the config flows."""
 
-    VERSION = 1
+    VERSION = 2
+
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._host = None
 
     @staticmethod
     @callback
@@ -80,7 +117,59 @@ class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def async_step_user(self, user_input=None):
         """Handle the config flow start."""
-        return await self.async_step_manual()
+        return await self.async_step_pick_gateway()
+
+    async def async_step_pick_gateway(self, user_input=None):
+        """Offer the gateways found on the local network."""
+        if user_input is not None:
+            if user_input[CONF_HOST] != DISCOVERY_MANUAL:
+                self._host = user_input[CONF_HOST]
+            return await self.async_step_manual()
+
+        hosts = await self._async_discover_gateways()
+        if not hosts:
+            return await self.async_step_manual()
+
+        data_schema = vol.Schema(
+            {
+                vol.Required(CONF_HOST, default=hosts[0]): SelectSelector(
+                    SelectSelectorConfig(options=[*hosts, DISCOVERY_MANUAL], mode=SelectSelectorMode.LIST,
+                                         translation_key="pick_gateway"),
+                    ),
+            }
+        )
+        return self.async_show_form(
+            step_id="pick_gateway",
+            data_schema=data_schema,
+        )
+
+    async def _async_discover_gateways(self):
+        """Scan the networks of the enabled adapters for gateways."""
+        hosts = {}
+        for adapter in await network.async_get_adapters(self.hass):
+            if not adapter["enabled"]:
+                continue
+            for ip_info in adapter["ipv4"]:
+                address = ipaddress.ip_address(ip_info["address"])
+                if address.is_loopback or address.is_link_local:
+                    continue
+                hosts.update(dict.fromkeys(subnet_hosts(ip_info["address"], ip_info["network_prefix"])))
+
+        started = time.monotonic()
+        found = await async_discover(list(hosts), int(CONF_PORT_DEFAULT))
+        LOGGER.debug("Probed %s hosts in %.2f s, found gateways: %s", len(hosts), time.monotonic() - started, found)
+        return found
+
+    async def async_step_import(self, import_data):
+        """Create an entry for a light provisioned from YAML or CSV."""
+        data = {key: import_data[key] for key in (CONF_HOST, CONF_PORT, CONF_SENDER, CONF_TYPE, CONF_NAME)}
+        options = {key: import_data[key] for key in (CONF_MAX_RGB, CONF_MAX_W)}
+        entry = await self.async_set_unique_id(f"{data[CONF_HOST]}:{data[CONF_PORT]}:{data[CONF_SENDER].lower()}")
+        if entry is not None:
+            # the YAML is imported on every start, so its changes have to reach the existing entry
+            self.hass.config_entries.async_update_entry(entry, data={**entry.data, **data}, options={**entry.options, **options})
+            return self.async_abort(reason="already_configured")
+        return self.async_create_entry(title=f"Iluminize LED Controller ({data[CONF_NAME]})", data=data, options=options)
 
     async def async_step_manual(self, user_input=None):
         """Request manual device configuration."""
@@ -89,13 +178,13 @@ class ConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             self._validate_input(user_input, errors)
             if not errors:
-                await self.async_set_unique_id(f"{user_input[CONF_HOST]}:{user_input[CONF_PORT]}")
+                await self.async_set_unique_id(f"{user_input[CONF_HOST]}:{user_input[CONF_PORT]}:{user_input[CONF_SENDER].lower()}")
                 self._abort_if_unique_id_configured()
                 return self.async_create_entry(title=f"Iluminize LED Controller ({user_input[CONF_NAME]})", data=user_input)
 
         data_schema = vol.Schema(
             {
-                vol.Required(CONF_HOST): cv.string,
+                vol.Required(CONF_HOST, description={"suggested_value": self._host}): cv.string,
                 vol.Optional(CONF_PORT, default=CONF_PORT_DEFAULT): cv.port,
                 vol.Required(CONF_SENDER): cv.string,
                 vol.Required(CONF_TYPE, default=CONF_TYPE_RGBW): SelectSelector(
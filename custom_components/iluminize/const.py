@@ -9,6 +9,29 @@ MODEL = "LED Controller"
 
 LOGGER = logging.getLogger("iluminize")
 
+DATA_HUB = "hub"
+DATA_ENTITIES = "entities"
+
+DISCOVERY_MANUAL = "manual"
+
+SERVICE_APPLY_SCENE = "apply_scene"
+ATTR_TARGETS = "targets"
+ATTR_MAX_CONCURRENCY = "max_concurrency"
+DEFAULT_MAX_CONCURRENCY = 8
+
+DATA_SHOW = "show"
+DATA_STREAM = "stream"
+DATA_RESYNC = "resync"
+EVENT_RESYNC = "iluminize_resync"
+SERVICE_RESYNC = "resync"
+FILES_DIRECTORY = "iluminize"
+SERVICE_RECORD_SHOW = "record_show"
+SERVICE_PLAY_SHOW = "play_show"
+SERVICE_STOP_SHOW = "stop_show"
+ATTR_FILENAME = "filename"
+ATTR_DURATION = "duration"
+SERVICE_IMPORT_LIGHTS = "import_lights"
+
 CONF_TYPE = "type"
 CONF_TYPE_RGBW = "RGBW"
 CONF_TYPE_RGB = "RGB"
@@ -23,13 +46,47 @@ CONF_MAX_RGB_REGEX = "^([0-9a-fA-F]{6})$"
 CONF_MAX_W = "max_w"
 CONF_MAX_W_DEFAULT = "FF"
 CONF_MAX_W_REGEX = "^([0-9a-fA-F]{2})$"
+CONF_MAX_RATE = "max_rate"
+CONF_MAX_RATE_DEFAULT = 20
+CONF_TRANSITION_FPS = "transition_fps"
+CONF_TRANSITION_FPS_DEFAULT = 20
+CONF_TRACE = "trace"
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_CONNECT_TIMEOUT_DEFAULT = 3.0
+CONF_SEND_TIMEOUT = "send_timeout"
+CONF_SEND_TIMEOUT_DEFAULT = 2.0
+CONF_KEEPALIVE = "keepalive"
+CONF_RESYNC = "resync"
+CONF_GATEWAY_MAX_RATE = "gateway_max_rate"
+CONF_GATEWAY_MAX_RATE_DEFAULT = 0
+CONF_REDUNDANCY = "redundancy"
+CONF_REDUNDANCY_SINGLE = "single"
+CONF_REDUNDANCY_DUPLICATE = "duplicate"
+CONF_REDUNDANCY_REPEAT = "repeat"
+CONF_REPEAT_DELAY = "repeat_delay"
+CONF_REPEAT_DELAY_DEFAULT = 50
+CONF_MAX_CONCURRENCY = "max_concurrency"
+CONF_MAX_CONCURRENCY_DEFAULT = 8
+CONF_STREAM = "stream"
+CONF_STREAM_HOST_DEFAULT = "0.0.0.0"
+CONF_STREAM_PORT_DEFAULT = 19446
+CONF_UNIFIED_RGBW = "unified_rgbw"
+CONF_GAMMA = "gamma"
+CONF_GAMMA_DEFAULT = 1.0
+CONF_WHITE_BALANCE = "white_balance"
+CONF_WHITE_BALANCE_DEFAULT = "1,0,0,0,1,0,0,0,1"
 
 DEFAULT_NAME_RGB = "Color"
 DEFAULT_NAME_WHITE = "White"
+DEFAULT_NAME_RGBW = "RGBW"
 
 ATTR_SAVED_BRIGHTNESS = "saved_brightness"
 ATTR_SAVED_RGB_COLOR = "saved_rgb_color"
+ATTR_SAVED_RGBW_COLOR = "saved_rgbw_color"
+ATTR_SAVED_COLOR_MODE = "saved_color_mode"
+ATTR_SAVED_COLOR_TEMP_KELVIN = "saved_color_temp_kelvin"
 
 PLATFORMS = [
-    Platform.LIGHT
+    Platform.LIGHT,
+    Platform.SENSOR,
 ]
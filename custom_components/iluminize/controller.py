@@ -10,76 +10,804 @@
 
 """
 
-from struct import (pack, unpack, calcsize)
-from enum import Enum
+from collections import deque
+import asyncio
 import socket
+import time
 import logging
 
+from .encoder import CHANNEL_RGB, CHANNEL_WHITE, PACKET_LENGTH, IluminizePacketEncoder
+from .metrics import IluminizeMetrics
+
 LOGGER = logging.getLogger("iluminize")
 
-_ILUMINIZE_SENDER_LEN = 3
-_ILUMINIZE_PKT_LEN = 12
 
+_DEFAULT_IDLE_TIMEOUT = 60
+_DEFAULT_CONNECT_TIMEOUT = 3.0
+_DEFAULT_SEND_TIMEOUT = 2.0
+_DEFAULT_MAX_RATE = 20
+_BACKOFF_INITIAL = 1.0
+_BACKOFF_MAX = 60.0
+_KEEPALIVE_IDLE = 10
+_KEEPALIVE_INTERVAL = 5
+_KEEPALIVE_COUNT = 3
+_DEFAULT_PROBE_INTERVAL = 30
+_DEFAULT_GLOBAL_CONCURRENCY = 8
 
-class IluminizeController(object):
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+REDUNDANCY_SINGLE = "single"
+REDUNDANCY_DUPLICATE = "duplicate"
+REDUNDANCY_REPEAT = "repeat"
+_DEFAULT_REPEAT_DELAY = 0.05
+
+
+class IluminizeCircuitBreaker(object):
+    """Fails fast while a gateway keeps failing, with exponential backoff.
+
+    After a failure the breaker opens for a backoff period that doubles with
+    every further consecutive failure. Once it elapses one attempt is let
+    through; a success closes the breaker again.
+    """
+
+    def __init__(self, initial=_BACKOFF_INITIAL, maximum=_BACKOFF_MAX):
+        self.initial = initial
+        self.maximum = maximum
+        self.failures = 0
+        self.open_until = 0.0
+
+    @property
+    def closed(self):
+        return self.failures == 0
+
+    def allow(self, now):
+        return now >= self.open_until
+
+    def success(self):
+        self.failures = 0
+        self.open_until = 0.0
+
+    def failure(self, now):
+        self.failures += 1
+        self.open_until = now + min(self.maximum, self.initial * 2 ** (self.failures - 1))
+
+
+class IluminizeTransportLimiter(object):
+    """Limits the writes in flight and per second across all gateways.
+
+    Slots are handed out in order of priority, interactive writes waiting
+    for a slot are served before background ones. Each gateway waits with
+    at most one write, so priority orders writes across gateways.
+    """
+
+    def __init__(self, max_concurrency=_DEFAULT_GLOBAL_CONCURRENCY, max_rate=None):
+        self.max_concurrency = max_concurrency
+        self.max_rate = max_rate
+        self.active = 0
+        self.waits = 0
+        self._waiters = (deque(), deque())
+        self._next_slot = 0.0
 
-    def __init__(self, host, port, sender):
+    @property
+    def waiting(self):
+        return sum(len(waiters) for waiters in self._waiters)
+
+    async def acquire(self, priority=PRIORITY_INTERACTIVE):
+        loop = asyncio.get_running_loop()
+        if self.active < self.max_concurrency and not self.waiting:
+            self.active += 1
+        else:
+            self.waits += 1
+            future = loop.create_future()
+            self._waiters[priority].append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # the slot was handed over just before the cancellation
+                    self.release()
+                elif future in self._waiters[priority]:
+                    # release() may already have dropped the cancelled future
+                    self._waiters[priority].remove(future)
+                raise
+
+        if self.max_rate:
+            now = loop.time()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1 / self.max_rate
+            if slot > now:
+                try:
+                    await asyncio.sleep(slot - now)
+                except asyncio.CancelledError:
+                    self.release()
+                    raise
+
+    def release(self):
+        """Hand the slot to the next waiter by priority or free it."""
+        for waiters in self._waiters:
+            while waiters:
+                future = waiters.popleft()
+                if not future.done():
+                    future.set_result(None)
+                    return
+        self.active -= 1
+
+    def as_dict(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_rate": self.max_rate,
+            "active": self.active,
+            "waiting": self.waiting,
+            "waits": self.waits,
+        }
+
+
+class IluminizeConnection(object):
+    """Long-lived TCP connection to an Iluminize gateway.
+
+    The stream is opened lazily, kept alive with TCP keepalive, reopened
+    transparently when the gateway drops it and closed again after it has
+    been idle for ``idle_timeout`` seconds. Connecting and writing give up
+    with a ``TimeoutError`` after ``connect_timeout`` and ``send_timeout``.
+    """
+
+    def __init__(self, host, port, idle_timeout=_DEFAULT_IDLE_TIMEOUT, metrics=None,
+                 connect_timeout=_DEFAULT_CONNECT_TIMEOUT, send_timeout=_DEFAULT_SEND_TIMEOUT):
         self.host = host
         self.port = port
-        self.sender = sender
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.send_timeout = send_timeout
+        self.metrics = metrics or IluminizeMetrics()
+        self._dropped = False
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+        self._idle_handle = None
+        self._last_used = 0.0
+        self.generation = 0
 
-    def set_rgb(self, red, green, blue):
-        (d1, d2, d3) = self._get_device_id()
-        packet = pack("BBBBBBBBBBBB", 0x55, d1, d2, d3, 0xf2, 0x01, int(red), int(green), int(blue), 0x00, 0xaa, 0xaa)
-        self._send(packet)
+    @property
+    def connected(self):
+        return self._writer is not None and not self._is_stale()
 
-    def set_white(self, white):
-        (d1, d2, d3) = self._get_device_id()
-        packet = pack("BBBBBBBBBBBB", 0x55, d1, d2, d3, 0x00, 0x01, 0x08, 0x4b, int(white), 0x00, 0xaa, 0xaa)
-        self._send(packet)
+    async def async_send(self, payload):
+        """Write the payload, reconnecting once if the connection went away."""
+        async with self._lock:
+            if self._writer is not None and self._is_stale():
+                self._dropped = True
+                self._close_locked()
+            reused = self._writer is not None
+            try:
+                await self._async_send_locked(payload)
+            except OSError:
+                self._dropped = True
+                self._close_locked()
+                if not reused:
+                    raise
+                # the gateway closed the connection behind our back, retry on a fresh one
+                await self._async_send_locked(payload)
+            self._last_used = asyncio.get_running_loop().time()
+            self._schedule_idle_close()
 
-    def _send(self, packet, sock=None):
-        if len(packet) != _ILUMINIZE_PKT_LEN:
-            raise Exception('Invalid data length. Packet malformed')
-            
-        packet = self._replace_checksum(packet)
-        # double the command, so the chance of successful transmission is increased
-        payload = packet + packet
-        
+    async def async_open(self):
+        """Open the connection ahead of the first write, reopening it if it went stale.
+
+        Returns whether a new connection had to be opened.
+        """
+        async with self._lock:
+            if self._writer is not None:
+                if not self._is_stale():
+                    return False
+                self._dropped = True
+                self._close_locked()
+            try:
+                await asyncio.wait_for(self._async_connect(), self.connect_timeout)
+            except asyncio.TimeoutError as err:
+                raise TimeoutError(f"Timeout connecting to {self.host}:{self.port}") from err
+            self._last_used = asyncio.get_running_loop().time()
+            self._schedule_idle_close()
+            return True
+
+    def close(self):
+        """Close the connection and cancel the idle timer."""
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+        self._close_locked()
+
+    async def _async_send_locked(self, payload):
+        try:
+            if self._writer is None:
+                await asyncio.wait_for(self._async_connect(), self.connect_timeout)
+            self._writer.write(payload)
+            await asyncio.wait_for(self._writer.drain(), self.send_timeout)
+        except asyncio.TimeoutError as err:
+            raise TimeoutError(f"Timeout talking to {self.host}:{self.port}") from err
+
+    async def _async_connect(self):
+        LOGGER.debug("Opening connection to %s:%s", self.host, self.port)
+        started = time.perf_counter()
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        self.metrics.record_connect((time.perf_counter() - started) * 1000, self._dropped)
+        self._dropped = False
+        self.generation += 1
+        sock = self._writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            if hasattr(socket, "TCP_KEEPIDLE"):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, _KEEPALIVE_IDLE)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, _KEEPALIVE_INTERVAL)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, _KEEPALIVE_COUNT)
+
+    def _is_stale(self):
+        # the gateway never talks back, so EOF on the reader means it hung up
+        return self._writer.is_closing() or self._reader.at_eof()
+
+    def _close_locked(self):
+        if self._writer is None:
+            return
+        LOGGER.debug("Closing connection to %s:%s", self.host, self.port)
+        self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    def _schedule_idle_close(self):
+        if not self.idle_timeout:
+            return
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+        self._idle_handle = asyncio.get_running_loop().call_later(self.idle_timeout, self._close_if_idle)
+
+    def _close_if_idle(self):
+        self._idle_handle = None
+        if self._lock.locked():
+            return
+        if asyncio.get_running_loop().time() - self._last_used >= self.idle_timeout:
+            self._close_locked()
+
+
+class IluminizeGateway(object):
+    """Shares one connection and one outbound scheduler between sender IDs.
+
+    Controllers with pending commands wait in a round robin queue, each turn
+    flushes the pending commands of one controller in a single write, so
+    receivers behind the same gateway are served fairly. Controllers with
+    interactive commands take their turn before those with background ones.
+    Writes go out one at a time, at most ``max_rate`` per second and only
+    while the shared ``limiter`` grants a slot.
+    """
+
+    def __init__(self, host, port, connection=None, breaker=None, limiter=None):
+        self.host = host
+        self.port = port
+        self.connection = connection or IluminizeConnection(host, port)
+        self.metrics = self.connection.metrics
+        self.breaker = breaker or IluminizeCircuitBreaker()
+        self.limiter = limiter
+        self.max_rate = None
+        self.redundancy = REDUNDANCY_DUPLICATE
+        self.repeat_delay = _DEFAULT_REPEAT_DELAY
+        self._next_write = 0.0
+        self._write_lock = asyncio.Lock()
+        self._listeners = []
+        self._ready = deque()
+        self._wakeup = asyncio.Event()
+        self._worker = None
+        self._prober = None
+        self._retry_handle = None
+        self._retry_task = None
+
+    @property
+    def available(self):
+        return self.breaker.closed
+
+    def configure(self, connect_timeout=None, send_timeout=None, keepalive=None, max_rate=None,
+                  redundancy=None, repeat_delay=None):
+        if max_rate is not None:
+            self.max_rate = max_rate or None
+        if redundancy is not None:
+            self.redundancy = redundancy
+        if repeat_delay is not None:
+            self.repeat_delay = repeat_delay
+        if connect_timeout is not None:
+            self.connection.connect_timeout = connect_timeout
+        if send_timeout is not None:
+            self.connection.send_timeout = send_timeout
+        if keepalive is not None:
+            self.set_keepalive(keepalive)
+
+    def set_keepalive(self, keepalive, interval=_DEFAULT_PROBE_INTERVAL):
+        """Keep the connection open and probe it every ``interval`` seconds.
+
+        The gateway has no request that leaves the lights untouched, so the
+        probe relies on TCP keepalive to notice a dead peer and only reopens
+        a connection found closed. Without keepalive idle connections close.
+        """
+        if self._prober is not None:
+            self._prober.cancel()
+            self._prober = None
+        if keepalive:
+            self.connection.idle_timeout = 0
+            self._prober = asyncio.get_running_loop().create_task(self._async_probe(interval))
+        else:
+            self.connection.idle_timeout = _DEFAULT_IDLE_TIMEOUT
+
+    async def async_warm(self):
+        """Open and verify the connection before the first command needs it."""
+        if not self.breaker.allow(asyncio.get_running_loop().time()):
+            return False
+        try:
+            if await self.connection.async_open():
+                LOGGER.debug("Connection to %s:%s is ready", self.host, self.port)
+        except (OSError, TimeoutError) as err:
+            self.metrics.record_failure("timeout" if isinstance(err, TimeoutError) else err.errno)
+            LOGGER.debug("Could not connect to %s:%s: %s", self.host, self.port, err)
+            self._record_result(False)
+            return False
+        self._record_result(True)
+        return True
+
+    def add_listener(self, listener):
+        """Call ``listener()`` whenever availability changes, returns a function removing it."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def encode_payload(self, packets):
+        """Join the packets of one write, sending each twice with the duplicate policy."""
+        if self.redundancy == REDUNDANCY_DUPLICATE:
+            # double each command, so the chance of successful transmission is increased
+            return b"".join(packet + packet for packet in packets)
+        return b"".join(packets)
+
+    def schedule(self, controller):
+        """Give the controller a turn once it has pending commands."""
+        if controller not in self._ready:
+            self._ready.append(controller)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._async_run())
+        self._wakeup.set()
+
+    def unschedule(self, controller):
+        if controller in self._ready:
+            self._ready.remove(controller)
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self._prober is not None:
+            self._prober.cancel()
+            self._prober = None
+        self._cancel_retry()
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+            self._retry_task = None
+        self._ready.clear()
+        self.connection.close()
+
+    async def async_write(self, payload, priority=PRIORITY_INTERACTIVE):
+        """Write the payload to the gateway, returns whether it succeeded.
+
+        Writes go out in the order they were started, so a background frame
+        taken before an interactive command cannot overwrite it on the light.
+        Priority only decides between gateways waiting for the limiter.
+        """
+        async with self._write_lock:
+            loop = asyncio.get_running_loop()
+            if not self.breaker.allow(loop.time()):
+                # the gateway is down, fail fast until the backoff elapsed
+                self.metrics.record_failure("circuit_open")
+                return False
+
+            if self.max_rate:
+                now = loop.time()
+                slot = max(now, self._next_write)
+                self._next_write = slot + 1 / self.max_rate
+                if slot > now:
+                    await asyncio.sleep(slot - now)
+
+            if self.limiter is not None:
+                await self.limiter.acquire(priority)
+            try:
+                return await self._async_write(payload)
+            finally:
+                if self.limiter is not None:
+                    self.limiter.release()
+
+    async def _async_write(self, payload):
         LOGGER.debug("Sending bytes: %s", payload.hex())
-        
+
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.connect(self._get_remote_socket())
-            sock.sendall(payload)
-            sock.close()
+            await self.connection.async_send(payload)
+            self._record_result(True)
+            return True
+        except TimeoutError:
+            self.metrics.record_failure("timeout")
+            LOGGER.error("Timeout while sending to %s:%s", self.host, self.port)
         except OSError as oserr:
+            self.metrics.record_failure(oserr.errno)
             if oserr.errno == 101:
                 LOGGER.error("Network is unreachable")
             else:
-                LOGGER.error("OSError happend while sending (%i)", oserr.errno)
-        except:
+                LOGGER.error("OSError happend while sending (%s)", oserr.errno)
+        except Exception:
+            self.metrics.record_failure()
             LOGGER.error("Error happend while sending")
+        self._record_result(False)
+        return False
+
+    def _record_result(self, success):
+        available = self.breaker.closed
+        if success:
+            self.breaker.success()
+            self._cancel_retry()
+        else:
+            loop = asyncio.get_running_loop()
+            self.breaker.failure(loop.time())
+            LOGGER.debug("Backing off from %s:%s for %.0f s", self.host, self.port,
+                         self.breaker.open_until - loop.time())
+            # unavailable lights get no commands, so try again once the backoff elapsed
+            self._cancel_retry()
+            self._retry_handle = loop.call_at(self.breaker.open_until, self._retry)
+        if self.breaker.closed != available:
+            for listener in list(self._listeners):
+                listener()
+
+    def _retry(self):
+        self._retry_handle = None
+        if self._retry_task is None or self._retry_task.done():
+            self._retry_task = asyncio.get_running_loop().create_task(self.async_warm())
+
+    def _cancel_retry(self):
+        if self._retry_handle is not None:
+            self._retry_handle.cancel()
+            self._retry_handle = None
+
+    async def async_write_commands(self, commands):
+        """Write pre-encoded ``(controller, channel, packet)`` commands at once.
+
+        The commands bypass the scheduler and supersede whatever is pending
+        for their channels. Returns whether the write succeeded.
+        """
+        claimed = [controller.claim(channel) for (controller, channel, _) in commands]
+        payload = self.encode_payload([packet for (_, _, packet) in commands])
+        started = time.perf_counter()
+        success = await self.async_write(payload)
+        elapsed = (time.perf_counter() - started) * 1000
+        for ((controller, channel, packet), futures) in zip(commands, claimed):
+            if success:
+                controller.metrics.record_send(elapsed, 1, len(payload) // len(commands))
+            else:
+                controller.metrics.record_failure()
+            controller.delivered(channel, packet, success, futures)
+        return success
+
+    async def _async_run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            while self._ready:
+                now = loop.time()
+                controller = next((c for c in self._ready if c.next_send <= now and c.priority == PRIORITY_INTERACTIVE), None)
+                if controller is None:
+                    controller = next((c for c in self._ready if c.next_send <= now), None)
+                if controller is None:
+                    # commands arriving meanwhile are coalesced into the pending ones
+                    await asyncio.sleep(min(c.next_send for c in self._ready) - now)
+                    continue
+
+                self._ready.remove(controller)
+                await controller.async_flush()
+                if controller.has_pending and controller not in self._ready:
+                    self._ready.append(controller)
+
+
+    async def _async_probe(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await self.async_warm()
+
+
+class IluminizeTransportHub(object):
+    """Owns the gateways of the installation, one per host and port.
+
+    All gateways share one limiter, so the whole installation stays within
+    ``max_concurrency`` writes in flight and ``max_rate`` writes per second.
+    """
+
+    def __init__(self, max_concurrency=_DEFAULT_GLOBAL_CONCURRENCY, max_rate=None):
+        self.limiter = IluminizeTransportLimiter(max_concurrency, max_rate)
+        self._gateways = {}
+
+    @property
+    def gateways(self):
+        return [entry[0] for entry in self._gateways.values()]
+
+    def acquire(self, host, port, connect_timeout=None, send_timeout=None, keepalive=None, max_rate=None,
+                redundancy=None, repeat_delay=None, owner=None):
+        """Return the gateway for host and port, configured for owner.
+
+        Several owners can share a gateway. Its settings are taken from the
+        first owner in sorted order, so they do not depend on the order in
+        which owners acquire or reload, and a warning names the settings the
+        other owners disagree on.
+        """
+        key = f"{host}:{port}"
+        if key not in self._gateways:
+            self._gateways[key] = [IluminizeGateway(host, port, limiter=self.limiter), 0, {}]
+        entry = self._gateways[key]
+        entry[1] += 1
+        entry[2][owner] = {
+            "connect_timeout": connect_timeout,
+            "send_timeout": send_timeout,
+            "keepalive": keepalive,
+            "max_rate": max_rate,
+            "redundancy": redundancy,
+            "repeat_delay": repeat_delay,
+        }
+        self._configure(entry)
+        return entry[0]
+
+    def release(self, gateway, owner=None):
+        key = f"{gateway.host}:{gateway.port}"
+        entry = self._gateways.get(key)
+        if entry is None or entry[0] is not gateway:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self._gateways[key]
+            gateway.close()
+        elif entry[2].pop(owner, None) is not None:
+            self._configure(entry)
+
+    def _configure(self, entry):
+        (gateway, _, settings) = entry
+        if not settings:
+            return
+        owners = sorted(settings, key=str)
+        applied = settings[owners[0]]
+        for owner in owners[1:]:
+            conflicts = [name for (name, value) in settings[owner].items()
+                         if value is not None and applied[name] is not None and value != applied[name]]
+            if conflicts:
+                LOGGER.warning("Gateway %s:%s is set up differently by %s and %s (%s), using the options of %s",
+                               gateway.host, gateway.port, owners[0], owner, ", ".join(conflicts), owners[0])
+        gateway.configure(**applied)
+
+
+class IluminizeController(object):
+    """Sends commands for one sender ID through its gateway.
+
+    Pending commands for the same channel are collapsed into the newest one
+    and a command whose packet equals the last one delivered on that channel
+    is not sent again. With the repeat policy of the gateway a delivered
+    packet is sent once more after a delay, unless a newer command for its
+    channel came in meanwhile.
+    """
+
+    def __init__(self, gateway, sender, max_rate=_DEFAULT_MAX_RATE):
+        self.gateway = gateway
+        self.sender = sender
+        self.max_rate = max_rate
+        self.coalesced = 0
+        self.dropped = 0
+        self.next_send = 0.0
+        self.metrics = IluminizeMetrics()
+        self.recorder = None
+        self._encoder = IluminizePacketEncoder(sender)
+        self._pending = {}
+        self._last_sent = {}
+        self._last_generation = None
+        self._repeats = {}
+        self._repeats_due = False
+        self._repeat_handle = None
+
+    @property
+    def host(self):
+        return self.gateway.host
+
+    @property
+    def port(self):
+        return self.gateway.port
+
+    @property
+    def encoder(self):
+        return self._encoder
+
+    @property
+    def has_pending(self):
+        return bool(self._pending) or self._repeats_due
+
+    @property
+    def queue_depth(self):
+        return len(self._pending)
+
+    @property
+    def priority(self):
+        """Return the most urgent priority of the pending commands."""
+        return min((pending[3] for pending in self._pending.values()), default=PRIORITY_BACKGROUND)
+
+    @property
+    def stats(self):
+        return {
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "queue_depth": self.queue_depth,
+        }
+
+    async def async_set_rgb(self, red, green, blue):
+        return await self.queue_rgb(red, green, blue)
+
+    async def async_set_white(self, white):
+        return await self.queue_white(white)
+
+    def queue_rgb(self, red, green, blue, priority=PRIORITY_INTERACTIVE):
+        """Queue an RGB command without waiting for it to be sent."""
+        packet = self._encoder.encode_rgb(int(red), int(green), int(blue))
+        return self._queue(CHANNEL_RGB, packet, priority=priority)
+
+    def queue_white(self, white, priority=PRIORITY_INTERACTIVE):
+        """Queue a white command without waiting for it to be sent."""
+        packet = self._encoder.encode_white(int(white))
+        return self._queue(CHANNEL_WHITE, packet, priority=priority)
+
+    def queue_rgbw(self, red, green, blue, white, priority=PRIORITY_INTERACTIVE):
+        """Queue RGB and white commands that go out in the same write."""
+        return self.queue_packets([
+            (CHANNEL_RGB, self._encoder.encode_rgb(int(red), int(green), int(blue))),
+            (CHANNEL_WHITE, self._encoder.encode_white(int(white))),
+        ], priority)
+
+    def queue_packets(self, commands, priority=PRIORITY_INTERACTIVE):
+        """Queue pre-encoded ``(channel, packet)`` commands that go out in the same write."""
+        future = None
+        for (channel, packet) in commands:
+            future = self._queue(channel, packet, future, priority)
+        return future
+
+    def close(self):
+        if self._repeat_handle is not None:
+            self._repeat_handle.cancel()
+            self._repeat_handle = None
+        self._repeats.clear()
+        self._repeats_due = False
+        self.gateway.unschedule(self)
+        for (_, futures, _, _) in self._pending.values():
+            self._resolve(futures, False)
+        self._pending.clear()
+
+    async def async_flush(self):
+        """Write all pending commands in one go, called by the gateway."""
+        self._check_generation()
+
+        pending = self._pending
+        self._pending = {}
+        repeats = self._take_repeats()
+
+        commands = []
+        priority = PRIORITY_BACKGROUND
+        for (channel, (packet, futures, queued_at, command_priority)) in pending.items():
+            priority = min(priority, command_priority)
+            if self._last_sent.get(channel) == packet:
+                self.dropped += 1
+                self._resolve(futures, True)
+            else:
+                commands.append((channel, packet, futures, queued_at))
+        if not commands and not repeats:
+            return
+
+        payload = self.gateway.encode_payload([packet for (_, packet, _, _) in commands])
+        repeat_payload = b"".join(repeats)
+        success = await self.gateway.async_write(payload + repeat_payload, priority)
+        now = asyncio.get_running_loop().time()
+        self.next_send = now + 1 / self.max_rate
+        if success:
+            if commands:
+                oldest = min(queued_at for (_, _, _, queued_at) in commands)
+                self.metrics.record_send((now - oldest) * 1000, len(commands), len(payload))
+            if repeats:
+                self.metrics.record_repeat(len(repeats), len(repeat_payload))
+        else:
+            self.metrics.record_failure()
+
+        for (channel, packet, futures, _) in commands:
+            self.delivered(channel, packet, success, futures)
+
+    def claim(self, channel):
+        """Remove the pending command of the channel, returns its futures."""
+        pending = self._pending.pop(channel, None)
+        if not self.has_pending:
+            self.gateway.unschedule(self)
+        if pending is None:
+            return []
+        self.coalesced += 1
+        return pending[1]
+
+    def delivered(self, channel, packet, success, futures=()):
+        """Record the outcome of writing a packet of the channel."""
+        self._check_generation()
+        if success:
+            if self.recorder is not None:
+                self.recorder.record(self, channel, packet)
+            self._last_sent[channel] = packet
+            if self.gateway.redundancy == REDUNDANCY_REPEAT:
+                self._repeat_later(channel, packet)
+        else:
+            self._last_sent.pop(channel, None)
+        self._resolve(futures, success)
+
+    def _repeat_later(self, channel, packet):
+        self._repeats[channel] = (packet, asyncio.get_running_loop().time() + self.gateway.repeat_delay)
+        self._arm_repeat()
+
+    def _arm_repeat(self):
+        if self._repeat_handle is not None or not self._repeats:
+            return
+        loop = asyncio.get_running_loop()
+        due = min(due for (_, due) in self._repeats.values())
+        self._repeat_handle = loop.call_at(due, self._repeat_ready)
+
+    def _repeat_ready(self):
+        self._repeat_handle = None
+        if self._repeats:
+            self._repeats_due = True
+            self.gateway.schedule(self)
+
+    def _take_repeats(self):
+        """Return the packets due for their repeat, the others wait for their delay."""
+        if not self._repeats_due:
+            return []
+        self._repeats_due = False
+        now = asyncio.get_running_loop().time()
+        repeats = []
+        for (channel, (packet, due)) in list(self._repeats.items()):
+            if due <= now:
+                del self._repeats[channel]
+                if self._last_sent.get(channel) == packet:
+                    repeats.append(packet)
+        self._arm_repeat()
+        return repeats
+
+    def _check_generation(self):
+        generation = self.gateway.connection.generation
+        if generation != self._last_generation:
+            # the gateway may have lost its state together with the connection
+            self._last_sent.clear()
+            self._last_generation = generation
+
+    def _queue(self, channel, packet, future=None, priority=PRIORITY_INTERACTIVE):
+        """Queue the packet, the future resolves once it or a newer one for the channel was handled."""
+        if len(packet) != PACKET_LENGTH:
+            raise Exception('Invalid data length. Packet malformed')
+
+        loop = asyncio.get_running_loop()
+        if future is None:
+            future = loop.create_future()
+
+        repeat = self._repeats.get(channel)
+        if repeat is not None and repeat[0] != packet:
+            # the repeat of an older command is superseded by this one
+            del self._repeats[channel]
+            self.metrics.repeats_cancelled += 1
+
+        pending = self._pending.get(channel)
+        if pending is not None:
+            # latest wins, the superseded command resolves together with the new one
+            self.coalesced += 1
+            pending[1].append(future)
+            self._pending[channel] = (packet, pending[1], pending[2], min(priority, pending[3]))
+        else:
+            self._pending[channel] = (packet, [future], loop.time(), priority)
+
+        self.gateway.schedule(self)
+        return future
 
-    def _get_remote_socket(self):
-        return (self.host, self.port)
-        
-    def _get_device_id(self):
-        d1 = int(self.sender[0:2], 16)
-        d2 = int(self.sender[2:4], 16)
-        d3 = int(self.sender[4:6], 16)
-                
-        return (d1, d2, d3)
-        
-    def _replace_checksum(self, packet):
-        values = bytearray(packet)
-        
-        checksum = 0
-        length = len(values)
-        
-        for i in range(4, length - 3):
-            checksum += values[i]
-    
-        checksum %= 0x100
-        values[length - 3] = checksum
-        return bytes(values)
+    def _resolve(self, futures, success):
+        for future in futures:
+            if not future.done():
+                future.set_result(success)
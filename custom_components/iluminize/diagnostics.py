@@ -0,0 +1,48 @@
+"""Diagnostics support for Iluminize WiFi LED Controller."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .colors import cache_info
+from .const import DOMAIN, DATA_HUB, DATA_STREAM, DATA_RESYNC
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, config_entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    controller = hass.data[DOMAIN][config_entry.entry_id]
+    gateway = controller.gateway
+
+    stream = hass.data[DOMAIN].get(DATA_STREAM)
+
+    return {
+        "entry": {
+            "data": dict(config_entry.data),
+            "options": dict(config_entry.options),
+        },
+        "controller": {
+            "sender": controller.sender,
+            "max_rate": controller.max_rate,
+            "stats": controller.stats,
+            "metrics": controller.metrics.as_dict(),
+        },
+        "gateway": {
+            "host": gateway.host,
+            "port": gateway.port,
+            "connected": gateway.connection.connected,
+            "generation": gateway.connection.generation,
+            "max_rate": gateway.max_rate,
+            "redundancy": gateway.redundancy,
+            "repeat_delay": gateway.repeat_delay,
+            "metrics": gateway.metrics.as_dict(),
+        },
+        "hub": {
+            "gateways": len(hass.data[DOMAIN][DATA_HUB].gateways),
+            "limiter": hass.data[DOMAIN][DATA_HUB].limiter.as_dict(),
+        },
+        "stream": stream.as_dict() if stream is not None else None,
+        "last_resync": hass.data[DOMAIN][DATA_RESYNC].last_report,
+        "color_cache": cache_info(),
+    }
@@ -0,0 +1,45 @@
+"""Discovery of Iluminize gateways on the local network."""
+
+import asyncio
+import ipaddress
+
+# Scanning is limited to the /24 around the local address, larger networks
+# would take too long to probe from a config flow.
+_MAX_PREFIX = 24
+_DEFAULT_TIMEOUT = 0.5
+_DEFAULT_CONCURRENCY = 64
+
+
+def subnet_hosts(address, prefix):
+    """Return the hosts of the network of address, narrowed down to a /24."""
+    network = ipaddress.ip_network(f"{address}/{max(prefix, _MAX_PREFIX)}", strict=False)
+    return [str(host) for host in network.hosts()]
+
+
+async def async_probe(host, port, timeout=_DEFAULT_TIMEOUT):
+    """Return whether host accepts connections on port.
+
+    Nothing is written, so probing never changes the state of a light.
+    """
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def async_discover(hosts, port, timeout=_DEFAULT_TIMEOUT, concurrency=_DEFAULT_CONCURRENCY):
+    """Probe hosts concurrently and return the ones listening on port, in order."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe(host):
+        async with semaphore:
+            return await async_probe(host, port, timeout)
+
+    results = await asyncio.gather(*(probe(host) for host in hosts))
+    return [host for (host, found) in zip(hosts, results) if found]
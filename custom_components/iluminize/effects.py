@@ -0,0 +1,96 @@
+"""Precomputed light effects for Iluminize WiFi LED Controller."""
+
+from array import array
+from colorsys import hsv_to_rgb
+from functools import lru_cache
+import math
+import random
+
+EFFECT_COLOR_LOOP = "color_loop"
+EFFECT_RAINBOW = "rainbow"
+EFFECT_BREATHE = "breathe"
+EFFECT_CANDLE = "candle"
+EFFECT_STROBE = "strobe"
+
+# effects rendering RGB colors, three values per frame
+COLOR_EFFECTS = [EFFECT_COLOR_LOOP, EFFECT_RAINBOW]
+# effects rendering an intensity applied to the current color, one value per frame
+INTENSITY_EFFECTS = [EFFECT_BREATHE, EFFECT_CANDLE, EFFECT_STROBE]
+
+_COLOR_LOOP_COLORS = ((255, 0, 0), (255, 255, 0), (0, 255, 0), (0, 255, 255), (0, 0, 255), (255, 0, 255))
+_COLOR_LOOP_HOLD = 1.0
+_COLOR_LOOP_FADE = 1.0
+_RAINBOW_PERIOD = 6.0
+_BREATHE_PERIOD = 4.0
+_CANDLE_DURATION = 10.0
+_STROBE_PERIOD = 0.2
+
+
+@lru_cache(maxsize=16)
+def render_effect(effect, fps):
+    """Return ``(frames, channels)`` for one cycle of the effect at the frame rate.
+
+    ``frames`` is a flat ``array('B')`` holding ``channels`` values per frame.
+    The result is cached and must not be modified.
+    """
+    if effect == EFFECT_COLOR_LOOP:
+        return (_render_color_loop(fps), 3)
+    if effect == EFFECT_RAINBOW:
+        return (_render_rainbow(fps), 3)
+    if effect == EFFECT_BREATHE:
+        return (_render_breathe(fps), 1)
+    if effect == EFFECT_CANDLE:
+        return (_render_candle(fps), 1)
+    if effect == EFFECT_STROBE:
+        return (_render_strobe(fps), 1)
+    raise ValueError(f"Unknown effect {effect}")
+
+
+def _frames(duration, fps):
+    return max(1, round(duration * fps))
+
+
+def _render_color_loop(fps):
+    frames = array("B")
+    hold = _frames(_COLOR_LOOP_HOLD, fps)
+    fade = _frames(_COLOR_LOOP_FADE, fps)
+    for (index, color) in enumerate(_COLOR_LOOP_COLORS):
+        following = _COLOR_LOOP_COLORS[(index + 1) % len(_COLOR_LOOP_COLORS)]
+        for _ in range(hold):
+            frames.extend(color)
+        for step in range(1, fade + 1):
+            progress = step / (fade + 1)
+            frames.extend(round(start + (end - start) * progress) for (start, end) in zip(color, following))
+    return frames
+
+
+def _render_rainbow(fps):
+    frames = array("B")
+    count = _frames(_RAINBOW_PERIOD, fps)
+    for index in range(count):
+        frames.extend(round(value * 255) for value in hsv_to_rgb(index / count, 1.0, 1.0))
+    return frames
+
+
+def _render_breathe(fps):
+    count = _frames(_BREATHE_PERIOD, fps)
+    # raised cosine, so the light rests briefly at both ends
+    return array("B", (round(255 * (0.5 - 0.5 * math.cos(2 * math.pi * index / count))) for index in range(count)))
+
+
+def _render_candle(fps):
+    # a fixed seed keeps the flicker identical between runs and strips cheap to cache
+    generator = random.Random(0x1c0)
+    frames = array("B")
+    level = 200.0
+    for _ in range(_frames(_CANDLE_DURATION, fps)):
+        level += (200 - level) * 0.15 + generator.gauss(0, 10)
+        if generator.random() < 0.03:
+            level -= generator.uniform(40, 90)
+        frames.append(min(255, max(60, round(level))))
+    return frames
+
+
+def _render_strobe(fps):
+    count = max(2, _frames(_STROBE_PERIOD, fps))
+    return array("B", (255 if index < count // 2 else 0 for index in range(count)))
@@ -0,0 +1,87 @@
+"""Packet encoding for Iluminize WiFi LED Controller."""
+
+from struct import Struct
+
+PACKET_LENGTH = 12
+
+CHANNEL_RGB = "rgb"
+CHANNEL_WHITE = "white"
+
+_RGB_COMMAND = (0xf2, 0x01)
+_WHITE_COMMAND = (0x00, 0x01, 0x08, 0x4b)
+
+# variable tail of a packet, starting at the first payload byte
+_RGB_VALUES = Struct("BBBB")
+_WHITE_VALUES = Struct("BB")
+_RGB_OFFSET = 6
+_WHITE_OFFSET = 8
+
+
+class IluminizePacketEncoder(object):
+    """Encodes packets for one sender ID without re-parsing or reallocating.
+
+    A packet looks like ``55 d1 d2 d3 c1 c2 v1 v2 v3 cs aa aa``, where
+    ``cs`` is the sum of bytes 4 to 8 modulo 256. The constant part of each
+    command is kept as a template together with its share of the checksum,
+    so encoding only writes the values and the checksum.
+    """
+
+    def __init__(self, sender):
+        device_id = bytes.fromhex(sender)
+        self.sender = sender
+        self._rgb_template = bytes((0x55,)) + device_id + bytes(_RGB_COMMAND + (0x00, 0x00, 0x00, 0x00, 0xaa, 0xaa))
+        self._white_template = bytes((0x55,)) + device_id + bytes(_WHITE_COMMAND + (0x00, 0x00, 0xaa, 0xaa))
+        self._rgb_checksum = sum(_RGB_COMMAND)
+        self._white_checksum = sum(_WHITE_COMMAND)
+        self._buffer = bytearray(PACKET_LENGTH)
+
+    def encode_rgb(self, red, green, blue):
+        """Return the packet setting the RGB channels."""
+        self.encode_rgb_into(self._buffer, 0, red, green, blue)
+        return bytes(self._buffer)
+
+    def encode_white(self, white):
+        """Return the packet setting the white channel."""
+        self.encode_white_into(self._buffer, 0, white)
+        return bytes(self._buffer)
+
+    def encode_rgb_into(self, buffer, offset, red, green, blue):
+        """Write the RGB packet into ``buffer`` at ``offset``."""
+        buffer[offset:offset + PACKET_LENGTH] = self._rgb_template
+        _RGB_VALUES.pack_into(buffer, offset + _RGB_OFFSET, red, green, blue,
+                              (self._rgb_checksum + red + green + blue) & 0xff)
+
+    def encode_white_into(self, buffer, offset, white):
+        """Write the white packet into ``buffer`` at ``offset``."""
+        buffer[offset:offset + PACKET_LENGTH] = self._white_template
+        _WHITE_VALUES.pack_into(buffer, offset + _WHITE_OFFSET, white,
+                                (self._white_checksum + white) & 0xff)
+
+    def encode_batch(self, frames, buffer=None):
+        """Encode a sequence of ``(channel, values)`` frames back to back.
+
+        The packets are written into ``buffer`` if it is large enough,
+        otherwise into a new one. Returns a memoryview over the encoded bytes.
+        """
+        length = len(frames) * PACKET_LENGTH
+        if buffer is None or len(buffer) < length:
+            buffer = bytearray(length)
+
+        offset = 0
+        encode_rgb_into = self.encode_rgb_into
+        encode_white_into = self.encode_white_into
+        for (channel, values) in frames:
+            if channel == CHANNEL_RGB:
+                encode_rgb_into(buffer, offset, *values)
+            else:
+                encode_white_into(buffer, offset, *values)
+            offset += PACKET_LENGTH
+
+        return memoryview(buffer)[:length]
+
+
+def packet_values(channel, packet):
+    """Return the output values carried by a packet of the channel."""
+    if channel == CHANNEL_RGB:
+        return tuple(packet[_RGB_OFFSET:_RGB_OFFSET + 3])
+    return (packet[_WHITE_OFFSET],)
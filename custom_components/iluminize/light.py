@@ -2,9 +2,16 @@
 from __future__ import annotations
 
 from typing import Any
+import asyncio
+import time
 
-from .controller import IluminizeController
-from .const import CONF_TYPE, CONF_TYPE_RGBW, CONF_TYPE_RGB, CONF_TYPE_W, CONF_SENDER, DOMAIN, MANUFACTURER, MODEL, LOGGER, DEFAULT_NAME_RGB, DEFAULT_NAME_WHITE, CONF_MAX_RGB, CONF_MAX_W, CONF_NAME_DEFAULT, CONF_PORT_DEFAULT, CONF_MAX_W_DEFAULT, CONF_MAX_RGB_DEFAULT, ATTR_SAVED_BRIGHTNESS, ATTR_SAVED_RGB_COLOR
+from .const import DATA_ENTITIES, DATA_RESYNC, CONF_RESYNC, CONF_TRACE, CONF_TYPE, CONF_TYPE_RGBW, CONF_TYPE_RGB, CONF_TYPE_W, CONF_SENDER, DOMAIN, MANUFACTURER, MODEL, LOGGER, DEFAULT_NAME_RGB, DEFAULT_NAME_WHITE, CONF_MAX_RGB, CONF_MAX_W, CONF_NAME_DEFAULT, CONF_PORT_DEFAULT, CONF_MAX_W_DEFAULT, CONF_MAX_RGB_DEFAULT, ATTR_SAVED_BRIGHTNESS, ATTR_SAVED_RGB_COLOR, ATTR_SAVED_RGBW_COLOR, ATTR_SAVED_COLOR_MODE, ATTR_SAVED_COLOR_TEMP_KELVIN, DEFAULT_NAME_RGBW, CONF_UNIFIED_RGBW, CONF_TRANSITION_FPS, CONF_TRANSITION_FPS_DEFAULT, CONF_GAMMA, CONF_GAMMA_DEFAULT, CONF_WHITE_BALANCE, CONF_WHITE_BALANCE_DEFAULT
+from .calibration import IluminizeCalibration, parse_white_balance
+from .controller import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from .encoder import CHANNEL_RGB, CHANNEL_WHITE, PACKET_LENGTH
+from .transition import IluminizeFade, async_play_frames
+from .effects import COLOR_EFFECTS, INTENSITY_EFFECTS, render_effect
+from .colors import MAX_COLOR_TEMP_KELVIN, MIN_COLOR_TEMP_KELVIN, hs_to_rgb, kelvin_to_rgb, kelvin_to_rgbw, xy_to_rgb
 
 
 import voluptuous as vol
@@ -12,17 +19,25 @@ import voluptuous as vol
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
     ATTR_COLOR_MODE,
+    ATTR_COLOR_TEMP_KELVIN,
+    ATTR_EFFECT,
+    ATTR_HS_COLOR,
     ATTR_RGB_COLOR,
+    ATTR_RGBW_COLOR,
+    ATTR_TRANSITION,
     ATTR_WHITE,
+    ATTR_XY_COLOR,
+    DOMAIN as LIGHT_DOMAIN,
     PLATFORM_SCHEMA,
     ColorMode,
     LightEntity,
     LightEntityFeature,
     ColorMode,
 )
-from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT, STATE_ON
-from homeassistant.core import HomeAssistant
+from homeassistant.const import ATTR_STATE, CONF_HOST, CONF_NAME, CONF_PORT, STATE_ON
+from homeassistant.core import HomeAssistant, callback
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import ConfigType, DiscoveryInfoType
 from homeassistant.helpers.restore_state import RestoreEntity
@@ -43,36 +58,270 @@ async def async_setup_entry(
     type = config_entry.data.get(CONF_TYPE)
     max_rgb = config_entry.options.get(CONF_MAX_RGB, CONF_MAX_RGB_DEFAULT)
     max_w = config_entry.options.get(CONF_MAX_W, CONF_MAX_W_DEFAULT)
+    transition_fps = config_entry.options.get(CONF_TRANSITION_FPS, CONF_TRANSITION_FPS_DEFAULT)
+    trace = config_entry.options.get(CONF_TRACE, False)
+    resync = config_entry.options.get(CONF_RESYNC, False)
+    unified_rgbw = config_entry.options.get(CONF_UNIFIED_RGBW, False)
+    gamma = config_entry.options.get(CONF_GAMMA, CONF_GAMMA_DEFAULT)
+    white_balance = parse_white_balance(config_entry.options.get(CONF_WHITE_BALANCE, CONF_WHITE_BALANCE_DEFAULT))
 
-    controller = IluminizeController(host, port, sender)
+    # options changes reload the entry, so the tables are only built here
+    calibration = IluminizeCalibration(max_rgb, max_w, gamma, white_balance)
+
+    controller = hass.data[DOMAIN][config_entry.entry_id]
     
-    if type == CONF_TYPE_RGBW:
+    entities = []
+    if type == CONF_TYPE_RGBW and unified_rgbw:
+        LOGGER.debug("Creating RGBW entity. Host: %s, Port: %s, Sender: %s, MaxRgb: %s, MaxWhite: %s", host, str(port), sender, max_rgb, max_w)
+        entities.append(IluminizeRGBWLight(device_name, controller, calibration, transition_fps, trace, resync))
+    elif type == CONF_TYPE_RGBW:
         LOGGER.debug("Creating RGB entity. Host: %s, Port: %s, Sender: %s, MaxRgb: %s", host, str(port), sender, max_rgb)
         LOGGER.debug("Creating White entity. Host: %s, Port: %s, Sender: %s, MaxWhite: %s", host, str(port), sender, max_w)
-        async_add_entities([IluminizeRGBLight(device_name, controller, max_rgb), IluminizeWhiteLight(device_name, controller, max_w)])
+        entities.append(IluminizeRGBLight(device_name, controller, calibration, transition_fps, trace, resync))
+        entities.append(IluminizeWhiteLight(device_name, controller, calibration, transition_fps, trace, resync))
     elif type == CONF_TYPE_RGB:
         LOGGER.debug("Creating RGB entity. Host: %s, Port: %s, Sender: %s, MaxRgb: %s", host, str(port), sender, max_rgb)
-        async_add_entities([IluminizeRGBLight(device_name, controller, max_rgb)])
+        entities.append(IluminizeRGBLight(device_name, controller, calibration, transition_fps, trace, resync))
     elif type == CONF_TYPE_W:
         LOGGER.debug("Creating White entity. Host: %s, Port: %s, Sender: %s, MaxWhite: %s", host, str(port), sender, max_w)
-        async_add_entities([IluminizeWhiteLight(device_name, controller, max_w)])
+        entities.append(IluminizeWhiteLight(device_name, controller, calibration, transition_fps, trace, resync))
+
+    # toggling unified_rgbw replaces the lights, drop the ones left from before
+    unique_ids = {entity.unique_id for entity in entities}
+    entity_registry = er.async_get(hass)
+    for entry in er.async_entries_for_config_entry(entity_registry, config_entry.entry_id):
+        if entry.domain == LIGHT_DOMAIN and entry.unique_id not in unique_ids:
+            LOGGER.debug("Removing stale entity %s", entry.entity_id)
+            entity_registry.async_remove(entry.entity_id)
+
+    async_add_entities(entities)
+
+
+class IluminizeLight(RestoreEntity, LightEntity):
+    """Base class for Iluminize WiFi LED Controller lights."""
+
+    _attr_supported_features = LightEntityFeature.TRANSITION | LightEntityFeature.EFFECT
+    _attr_effect_list = COLOR_EFFECTS + INTENSITY_EFFECTS
+
+    def __init__(self, device_name, controller, transition_fps, trace=False, resync=False):
+        """Initialise Iluminize WiFi LED Controller.
+
+        :param device_name: Name for this device to use.
+        :param controller: Instance of the Iluminize controller.
+        :param transition_fps: Frames per second sent during transitions.
+        :param trace: Whether to time commands from the service call to the wire.
+        :param resync: Whether to send the state after startup and reconnects.
+        """
+        self._device_name = device_name
+        self._controller = controller
+        self._transition_fps = transition_fps
+        self._trace = trace
+        self.resync = resync
+        self._animation_task = None
+        self._output = None
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info."""
+        return DeviceInfo(
+            identifiers={
+                (DOMAIN, f"{self._controller.host}:{self._controller.port}:{self._controller.sender.lower()}")
+            },
+            name=self._device_name,
+            manufacturer=MANUFACTURER,
+            model=MODEL,
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return whether the gateway of this light is reachable."""
+        return self._controller.gateway.available
+
+    async def async_added_to_hass(self) -> None:
+        """Register the entity for the integration services."""
+        await super().async_added_to_hass()
+        self.hass.data[DOMAIN][DATA_ENTITIES][self.entity_id] = self
+        self.async_on_remove(self._controller.gateway.add_listener(self._async_availability_changed))
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop a running transition or effect when the entity is removed."""
+        self._cancel_animation()
+        self.hass.data[DOMAIN][DATA_ENTITIES].pop(self.entity_id, None)
+
+    @callback
+    def _async_availability_changed(self) -> None:
+        self.async_write_ha_state()
+        if self.resync and self.available:
+            # the gateway may have lost its state while it was unreachable
+            self.hass.data[DOMAIN][DATA_RESYNC].request(self)
+
+    @property
+    def controller(self):
+        """Return the controller of this light."""
+        return self._controller
+
+    @property
+    def resync_ready(self):
+        """Return whether the state is known and no animation keeps sending it."""
+        return self._attr_is_on is not None and (self._animation_task is None or self._animation_task.done())
+
+    def scene_commands(self, values):
+        """Apply scene values to the entity state and return the encoded commands.
+
+        The commands are ``(controller, channel, packet)`` tuples that the
+        caller writes to the gateway.
+        """
+        self._cancel_animation()
+        return self._output_commands(self._apply_scene(values))
+
+    def resync_commands(self):
+        """Return the encoded commands for the current state, like ``scene_commands``."""
+        return self._output_commands(self._apply_scene({ATTR_STATE: self._attr_is_on}))
 
+    def _restore_color_mode(self, color_mode, rgb, color_temp_kelvin) -> None:
+        """Restore the color mode, deriving its color attribute from the saved RGB color."""
+        try:
+            color_mode = ColorMode(color_mode)
+        except ValueError:
+            return
+        if color_mode == ColorMode.HS:
+            self._attr_hs_color = color_util.color_RGB_to_hs(*rgb)
+        elif color_mode == ColorMode.XY:
+            self._attr_xy_color = color_util.color_RGB_to_xy(*rgb)
+        elif color_mode == ColorMode.COLOR_TEMP:
+            if color_temp_kelvin is None:
+                return
+            self._attr_color_temp_kelvin = color_temp_kelvin
+        elif color_mode not in self._attr_supported_color_modes:
+            return
+        self._attr_color_mode = color_mode
 
-class IluminizeWhiteLight(RestoreEntity, LightEntity):
+    def _output_commands(self, output):
+        self._output = output
+        return [(self._controller, channel, packet) for (channel, packet) in self._encode_output(output)]
+
+    def stream_rgb(self, rgb):
+        """Queue a frame of the stream input, bypassing the entity state."""
+        if self._animation_task is not None:
+            self._cancel_animation()
+        output = self._stream_output(rgb)
+        self._output = output
+        return self._queue_output(output, PRIORITY_BACKGROUND)
+
+    async def _async_apply(self, output, kwargs) -> None:
+        """Start the requested effect, otherwise send the output values."""
+        effect = kwargs.get(ATTR_EFFECT)
+        if effect in self.effect_list:
+            self._start_effect(effect)
+        else:
+            await self._async_set_output(output, kwargs.get(ATTR_TRANSITION))
+
+    async def _async_set_output(self, output, transition=None) -> None:
+        """Send the output values, fading to them if a transition is given."""
+        self._cancel_animation()
+
+        if not transition or self._output is None:
+            started = time.perf_counter()
+            self._output = output
+            await self._queue_output(output)
+            if self._trace:
+                elapsed = (time.perf_counter() - started) * 1000
+                self._controller.metrics.trace.record(elapsed)
+                LOGGER.debug("%s: command reached the wire after %.3f ms", self.entity_id, elapsed)
+            return
+
+        fade = IluminizeFade(self._output, output, transition, self._transition_fps)
+        self._animation_task = self.hass.async_create_task(self._async_run_fade(fade))
+
+    async def _async_run_fade(self, fade) -> None:
+        def send(output):
+            self._output = output
+            return self._queue_output(output, PRIORITY_BACKGROUND)
+
+        try:
+            await async_play_frames(fade.frame, fade.frame_count, self._transition_fps, send)
+        finally:
+            # a finished fade no longer holds back the resync of the light
+            if self._animation_task is asyncio.current_task():
+                self._animation_task = None
+
+    def _start_effect(self, effect) -> None:
+        """Stream the precomputed frames of the effect until another command arrives."""
+        self._cancel_animation()
+        self._attr_effect = effect
+
+        (values, channels) = render_effect(effect, self._transition_fps)
+        outputs = [self._effect_output(values[offset:offset + channels]) for offset in range(0, len(values), channels)]
+
+        # encode every frame once up front, the loop only queues ready packets
+        frames = [self._output_frames(output) for output in outputs]
+        packets = bytes(self._controller.encoder.encode_batch([frame for frame_list in frames for frame in frame_list]))
+        commands = []
+        offset = 0
+        for frame_list in frames:
+            commands.append([(channel, packets[offset + index * PACKET_LENGTH:offset + (index + 1) * PACKET_LENGTH])
+                             for (index, (channel, _)) in enumerate(frame_list)])
+            offset += len(frame_list) * PACKET_LENGTH
+
+        def send(index):
+            self._output = outputs[index]
+            return self._controller.queue_packets(commands[index], PRIORITY_BACKGROUND)
+
+        self._animation_task = self.hass.async_create_task(
+            async_play_frames(lambda index: index % len(commands), None, self._transition_fps, send)
+        )
+
+    def _cancel_animation(self) -> None:
+        self._attr_effect = None
+        if self._animation_task is not None:
+            self._animation_task.cancel()
+            self._animation_task = None
+
+    def _queue_output(self, output, priority=PRIORITY_INTERACTIVE):
+        """Queue the output values on the controller and return the delivery future."""
+        return self._controller.queue_packets(self._encode_output(output), priority)
+
+    def _encode_output(self, output):
+        """Return the ``(channel, packet)`` list for the output values."""
+        frames = self._output_frames(output)
+        packets = bytes(self._controller.encoder.encode_batch(frames))
+        return [(channel, packets[index * PACKET_LENGTH:(index + 1) * PACKET_LENGTH])
+                for (index, (channel, _)) in enumerate(frames)]
+
+    def _output_frames(self, output):
+        """Return the ``(channel, values)`` frames for the output values."""
+        raise NotImplementedError
+
+    def _effect_output(self, values):
+        """Return the output values for one effect frame of one or three values."""
+        raise NotImplementedError
+
+    def _apply_scene(self, values):
+        """Update the entity state from scene values and return the output values."""
+        raise NotImplementedError
+
+    def _stream_output(self, rgb):
+        """Return the output values for an RGB frame of the stream input."""
+        raise NotImplementedError
+
+class IluminizeWhiteLight(IluminizeLight):
     """Iluminize White WiFi LED Controller."""
+
+    _attr_effect_list = INTENSITY_EFFECTS
     
-    def __init__(self, device_name, controller, max_w):
+    def __init__(self, device_name, controller, calibration, transition_fps, trace=False, resync=False):
         """Initialise Iluminize WiFi LED Controller.
 
         :param device_name: Name for this device to use.
         :param controller: Instance of the Iluminize controller.
-        :param max_w: Maximum value for the white channel as hex string.
+        :param calibration: Lookup tables mapping brightness to output values.
+        :param transition_fps: Frames per second sent during transitions.
+        :param trace: Whether to time commands from the service call to the wire.
         """
-        self._attr_unique_id = f"{DOMAIN}_{controller.host}_{controller.port}_white"
+        super().__init__(device_name, controller, transition_fps, trace, resync)
+        self._attr_unique_id = f"{DOMAIN}_{controller.host}_{controller.port}_{controller.sender.lower()}_white"
         self.entity_id = f"light.{self.unique_id}"
-        self._device_name = device_name
-        self._controller = controller
-        self._max_w = max_w
+        self._calibration = calibration
         
         color_modes = {ColorMode.ONOFF}
         color_modes.add(ColorMode.BRIGHTNESS)
@@ -94,24 +343,15 @@ class IluminizeWhiteLight(RestoreEntity, LightEntity):
 
         self._attr_brightness = brightness
         self._attr_is_on = is_on
+        if state is not None:
+            # the light still shows the restored state, so the first transition fades from it
+            self._output = self._white_output(brightness if is_on else 0)
 
     @property
     def name(self):
         """Return the default name for the light."""
         return DEFAULT_NAME_WHITE
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return the device info."""
-        return DeviceInfo(
-            identifiers={
-                (DOMAIN, f"{self._controller.host}:{self._controller.port}")
-            },
-            name=self._device_name,
-            manufacturer=MANUFACTURER,
-            model=MODEL,
-        )
-        
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return attributes of the light."""
@@ -119,46 +359,64 @@ class IluminizeWhiteLight(RestoreEntity, LightEntity):
             ATTR_SAVED_BRIGHTNESS: self._attr_brightness,
         }
 
-    def turn_on(self, **kwargs: Any) -> None:
+    async def async_turn_on(self, **kwargs: Any) -> None:
         """Instruct the light to turn on."""
         self._attr_is_on = True
         self._attr_brightness = kwargs.get(ATTR_BRIGHTNESS, self._attr_brightness)
-        self._set_white(self._attr_brightness)
-        self.schedule_update_ha_state()
+        await self._async_apply(self._white_output(self._attr_brightness), kwargs)
+        self.async_write_ha_state()
 
-    def turn_off(self, **kwargs: Any) -> None:
+    async def async_turn_off(self, **kwargs: Any) -> None:
         """Instruct the light to turn off."""
         self._attr_is_on = False
-        self._set_white(0)
-        self.schedule_update_ha_state()
+        await self._async_set_white(0, kwargs.get(ATTR_TRANSITION))
+        self.async_write_ha_state()
+
+    async def _async_set_white(self, brightness, transition=None) -> None:
+        await self._async_set_output(self._white_output(brightness), transition)
+
+    def _white_output(self, brightness):
+        return (self._calibration.white(brightness),)
+
+    def _output_frames(self, output):
+        return [(CHANNEL_WHITE, output)]
 
-    def _set_white(self, brightness) -> None:
-        max_w = int(self._max_w, 16)
-        white = brightness / 255 * max_w
-        self._controller.set_white(white)
+    def _effect_output(self, values):
+        return self._white_output(self._attr_brightness * values[0] // 255)
 
-class IluminizeRGBLight(RestoreEntity, LightEntity):
+    def _stream_output(self, rgb):
+        return self._white_output(max(rgb))
+
+    def _apply_scene(self, values):
+        self._attr_is_on = values.get(ATTR_STATE, True)
+        self._attr_brightness = values.get(ATTR_BRIGHTNESS, self._attr_brightness)
+        return self._white_output(self._attr_brightness if self._attr_is_on else 0)
+
+class IluminizeRGBLight(IluminizeLight):
     """Iluminize RGB WiFi LED Controller."""
 
-    def __init__(self, device_name, controller, max_rgb):
+    def __init__(self, device_name, controller, calibration, transition_fps, trace=False, resync=False):
         """Initialise Iluminize WiFi LED Controller.
 
         :param device_name: Name for this device to use.
-        :param type: The type for this entity. e.g. RGBW
         :param controller: Instance of the Iluminize controller.
-        :param max_w: Maximum value for RGB as hex string.
+        :param calibration: Lookup tables mapping colors and brightness to output values.
+        :param transition_fps: Frames per second sent during transitions.
+        :param trace: Whether to time commands from the service call to the wire.
         """
-        self._attr_unique_id = f"{DOMAIN}_{controller.host}_{controller.port}_rgb"
+        super().__init__(device_name, controller, transition_fps, trace, resync)
+        self._attr_unique_id = f"{DOMAIN}_{controller.host}_{controller.port}_{controller.sender.lower()}_rgb"
         self.entity_id = f"light.{self.unique_id}"
-        self._device_name = device_name
-        self._controller = controller
-        self._max_rgb = max_rgb
+        self._calibration = calibration
 
-        color_modes = {ColorMode.ONOFF}
-        color_modes.add(ColorMode.BRIGHTNESS)
-        color_modes.add(ColorMode.RGB)
+        color_modes = {ColorMode.RGB}
+        color_modes.add(ColorMode.HS)
+        color_modes.add(ColorMode.XY)
+        color_modes.add(ColorMode.COLOR_TEMP)
         self._attr_supported_color_modes = color_modes
         self._attr_color_mode = ColorMode.RGB
+        self._attr_min_color_temp_kelvin = MIN_COLOR_TEMP_KELVIN
+        self._attr_max_color_temp_kelvin = MAX_COLOR_TEMP_KELVIN
         
     async def async_added_to_hass(self) -> None:
         """Call when entity about to be added to hass."""
@@ -168,72 +426,216 @@ class IluminizeRGBLight(RestoreEntity, LightEntity):
         is_on = False
         brightness = 127
         rgb_color = (255, 255, 255)
+        color_mode = ColorMode.RGB
+        color_temp_kelvin = None
         
         state = await self.async_get_last_state()
         if state is not None:
             is_on = state.state == STATE_ON
             brightness = state.attributes.get(ATTR_SAVED_BRIGHTNESS) or brightness
             rgb_color = state.attributes.get(ATTR_SAVED_RGB_COLOR) or rgb_color
+            color_mode = state.attributes.get(ATTR_SAVED_COLOR_MODE) or color_mode
+            color_temp_kelvin = state.attributes.get(ATTR_SAVED_COLOR_TEMP_KELVIN)
 
-        self._attr_rgb_color = rgb_color
+        self._attr_rgb_color = tuple(rgb_color)
+        self._restore_color_mode(color_mode, self._attr_rgb_color, color_temp_kelvin)
         self._attr_brightness = brightness
         self._attr_is_on = is_on
+        if state is not None:
+            self._output = self._rgb_output(self._attr_rgb_color, brightness if is_on else 0)
 
     @property
     def name(self):
         """Return the default name for the light."""
         return DEFAULT_NAME_RGB
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return the device info."""
-        return DeviceInfo(
-            identifiers={
-                (DOMAIN, f"{self._controller.host}:{self._controller.port}")
-            },
-            name=self._device_name,
-            manufacturer=MANUFACTURER,
-            model=MODEL,
-        )
-
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return attributes of the light."""
         return {
             ATTR_SAVED_BRIGHTNESS: self._attr_brightness,
             ATTR_SAVED_RGB_COLOR: self._attr_rgb_color,
+            ATTR_SAVED_COLOR_MODE: self._attr_color_mode,
+            ATTR_SAVED_COLOR_TEMP_KELVIN: self._attr_color_temp_kelvin,
         }
 
-    def turn_on(self, **kwargs: Any) -> None:
+    async def async_turn_on(self, **kwargs: Any) -> None:
         """Instruct the light to turn on."""
         self._attr_is_on = True
-        self._attr_rgb_color = kwargs.get(ATTR_RGB_COLOR, self._attr_rgb_color)
+        self._update_color(kwargs)
         self._attr_brightness = kwargs.get(ATTR_BRIGHTNESS, self._attr_brightness)
         
-        (red, green, blue) = self._attr_rgb_color
-        brightness = self._attr_brightness
-        red = red / 255 * brightness
-        green = green / 255 * brightness
-        blue = blue / 255 * brightness
+        await self._async_apply(self._rgb_output(self._attr_rgb_color, self._attr_brightness), kwargs)
+        self.async_write_ha_state()
 
-        self._set_rgb((red, green, blue))
-        self.schedule_update_ha_state()
 
-
-    def turn_off(self, **kwargs: Any) -> None:
+    async def async_turn_off(self, **kwargs: Any) -> None:
         """Instruct the light to turn off."""
         self._attr_is_on = False
-        self._set_rgb((0, 0, 0))
-        self.schedule_update_ha_state()
+        await self._async_set_rgb((0, 0, 0), 0, kwargs.get(ATTR_TRANSITION))
+        self.async_write_ha_state()
     
-    def _set_rgb(self, rgb) -> None:
-        max_rgb = self._max_rgb
-        max_red = int(max_rgb[0:2], 16)
-        max_green = int(max_rgb[2:4], 16)
-        max_blue = int(max_rgb[4:6], 16)
-            
-        red = rgb[0] / 255 * max_red
-        green = rgb[1] / 255 * max_green
-        blue = rgb[2] / 255 * max_blue
-            
-        self._controller.set_rgb(red, green, blue)
+    async def _async_set_rgb(self, rgb, brightness, transition=None) -> None:
+        await self._async_set_output(self._rgb_output(rgb, brightness), transition)
+
+    def _update_color(self, values):
+        """Take the color from whichever color attribute the values carry."""
+        if ATTR_HS_COLOR in values:
+            self._attr_hs_color = values[ATTR_HS_COLOR]
+            self._attr_rgb_color = hs_to_rgb(self._attr_hs_color)
+            self._attr_color_mode = ColorMode.HS
+        elif ATTR_XY_COLOR in values:
+            self._attr_xy_color = values[ATTR_XY_COLOR]
+            self._attr_rgb_color = xy_to_rgb(self._attr_xy_color)
+            self._attr_color_mode = ColorMode.XY
+        elif ATTR_COLOR_TEMP_KELVIN in values:
+            self._attr_color_temp_kelvin = values[ATTR_COLOR_TEMP_KELVIN]
+            self._attr_rgb_color = kelvin_to_rgb(self._attr_color_temp_kelvin)
+            self._attr_color_mode = ColorMode.COLOR_TEMP
+        elif ATTR_RGB_COLOR in values:
+            self._attr_rgb_color = values[ATTR_RGB_COLOR]
+            self._attr_color_mode = ColorMode.RGB
+
+    def _rgb_output(self, rgb, brightness):
+        (red, green, blue) = rgb
+        return self._calibration.rgb(red, green, blue, brightness)
+
+    def _output_frames(self, output):
+        return [(CHANNEL_RGB, output)]
+
+    def _effect_output(self, values):
+        if len(values) == 3:
+            return self._rgb_output(values, self._attr_brightness)
+        return self._rgb_output(self._attr_rgb_color, self._attr_brightness * values[0] // 255)
+
+    def _stream_output(self, rgb):
+        return self._rgb_output(rgb, 255)
+
+    def _apply_scene(self, values):
+        self._attr_is_on = values.get(ATTR_STATE, True)
+        self._update_color(values)
+        self._attr_brightness = values.get(ATTR_BRIGHTNESS, self._attr_brightness)
+        return self._rgb_output(self._attr_rgb_color, self._attr_brightness if self._attr_is_on else 0)
+
+class IluminizeRGBWLight(IluminizeLight):
+    """Iluminize RGBW WiFi LED Controller driving both channels as one light."""
+
+    def __init__(self, device_name, controller, calibration, transition_fps, trace=False, resync=False):
+        """Initialise Iluminize WiFi LED Controller.
+
+        :param device_name: Name for this device to use.
+        :param controller: Instance of the Iluminize controller.
+        :param calibration: Lookup tables mapping colors and brightness to output values.
+        :param transition_fps: Frames per second sent during transitions.
+        :param trace: Whether to time commands from the service call to the wire.
+        """
+        super().__init__(device_name, controller, transition_fps, trace, resync)
+        self._attr_unique_id = f"{DOMAIN}_{controller.host}_{controller.port}_{controller.sender.lower()}_rgbw"
+        self.entity_id = f"light.{self.unique_id}"
+        self._calibration = calibration
+
+        self._attr_supported_color_modes = {ColorMode.RGBW, ColorMode.HS, ColorMode.XY, ColorMode.COLOR_TEMP}
+        self._attr_color_mode = ColorMode.RGBW
+        self._attr_min_color_temp_kelvin = MIN_COLOR_TEMP_KELVIN
+        self._attr_max_color_temp_kelvin = MAX_COLOR_TEMP_KELVIN
+
+    async def async_added_to_hass(self) -> None:
+        """Call when entity about to be added to hass."""
+        # If not None, we got an initial value.
+        await super().async_added_to_hass()
+
+        is_on = False
+        brightness = 127
+        rgbw_color = (0, 0, 0, 255)
+        color_mode = ColorMode.RGBW
+        color_temp_kelvin = None
+
+        state = await self.async_get_last_state()
+        if state is not None:
+            is_on = state.state == STATE_ON
+            brightness = state.attributes.get(ATTR_SAVED_BRIGHTNESS) or brightness
+            rgbw_color = state.attributes.get(ATTR_SAVED_RGBW_COLOR) or rgbw_color
+            color_mode = state.attributes.get(ATTR_SAVED_COLOR_MODE) or color_mode
+            color_temp_kelvin = state.attributes.get(ATTR_SAVED_COLOR_TEMP_KELVIN)
+
+        self._attr_rgbw_color = tuple(rgbw_color)
+        self._restore_color_mode(color_mode, self._attr_rgbw_color[:3], color_temp_kelvin)
+        self._attr_brightness = brightness
+        self._attr_is_on = is_on
+        if state is not None:
+            self._output = self._rgbw_output(self._attr_rgbw_color, brightness if is_on else 0)
+
+    @property
+    def name(self):
+        """Return the default name for the light."""
+        return DEFAULT_NAME_RGBW
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return attributes of the light."""
+        return {
+            ATTR_SAVED_BRIGHTNESS: self._attr_brightness,
+            ATTR_SAVED_RGBW_COLOR: self._attr_rgbw_color,
+            ATTR_SAVED_COLOR_MODE: self._attr_color_mode,
+            ATTR_SAVED_COLOR_TEMP_KELVIN: self._attr_color_temp_kelvin,
+        }
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Instruct the light to turn on."""
+        self._attr_is_on = True
+        self._update_color(kwargs)
+        self._attr_brightness = kwargs.get(ATTR_BRIGHTNESS, self._attr_brightness)
+
+        await self._async_apply(self._rgbw_output(self._attr_rgbw_color, self._attr_brightness), kwargs)
+        self.async_write_ha_state()
+
+    async def async_turn_off(self, **kwargs: Any) -> None:
+        """Instruct the light to turn off."""
+        self._attr_is_on = False
+        await self._async_set_output((0, 0, 0, 0), kwargs.get(ATTR_TRANSITION))
+        self.async_write_ha_state()
+
+    def _update_color(self, values):
+        """Take the color from whichever color attribute the values carry.
+
+        Colors are mixed from the RGB channels, color temperatures from the
+        white channel tinted by the RGB channels.
+        """
+        if ATTR_HS_COLOR in values:
+            self._attr_hs_color = values[ATTR_HS_COLOR]
+            self._attr_rgbw_color = hs_to_rgb(self._attr_hs_color) + (0,)
+            self._attr_color_mode = ColorMode.HS
+        elif ATTR_XY_COLOR in values:
+            self._attr_xy_color = values[ATTR_XY_COLOR]
+            self._attr_rgbw_color = xy_to_rgb(self._attr_xy_color) + (0,)
+            self._attr_color_mode = ColorMode.XY
+        elif ATTR_COLOR_TEMP_KELVIN in values:
+            self._attr_color_temp_kelvin = values[ATTR_COLOR_TEMP_KELVIN]
+            self._attr_rgbw_color = kelvin_to_rgbw(self._attr_color_temp_kelvin)
+            self._attr_color_mode = ColorMode.COLOR_TEMP
+        elif ATTR_RGBW_COLOR in values:
+            self._attr_rgbw_color = values[ATTR_RGBW_COLOR]
+            self._attr_color_mode = ColorMode.RGBW
+
+    def _rgbw_output(self, rgbw, brightness):
+        (red, green, blue, white) = rgbw
+        return self._calibration.rgbw(red, green, blue, white, brightness)
+
+    def _output_frames(self, output):
+        return [(CHANNEL_RGB, output[:3]), (CHANNEL_WHITE, output[3:])]
+
+    def _effect_output(self, values):
+        if len(values) == 3:
+            (red, green, blue) = values
+            return self._rgbw_output((red, green, blue, 0), self._attr_brightness)
+        return self._rgbw_output(self._attr_rgbw_color, self._attr_brightness * values[0] // 255)
+
+    def _stream_output(self, rgb):
+        (red, green, blue) = rgb
+        return self._rgbw_output((red, green, blue, 0), 255)
+
+    def _apply_scene(self, values):
+        self._attr_is_on = values.get(ATTR_STATE, True)
+        self._update_color(values)
+        self._attr_brightness = values.get(ATTR_BRIGHTNESS, self._attr_brightness)
+        return self._rgbw_output(self._attr_rgbw_color, self._attr_brightness if self._attr_is_on else 0)
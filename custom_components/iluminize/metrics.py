@@ -0,0 +1,110 @@
+"""Performance metrics for Iluminize WiFi LED Controller."""
+
+from bisect import bisect_left
+import time
+
+# upper bounds of the latency histogram buckets in milliseconds, the last bucket is open
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class IluminizeLatencyHistogram(object):
+    """Fixed bucket latency histogram in milliseconds."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.last = None
+
+    def record(self, milliseconds):
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.last = milliseconds
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the given percentile."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for (index, count) in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else float("inf")
+        return float("inf")
+
+    def as_dict(self):
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "last": self.last,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class IluminizeMetrics(object):
+    """Counters and histograms of a controller or gateway send path."""
+
+    def __init__(self):
+        self.send_latency = IluminizeLatencyHistogram()
+        self.connect_time = IluminizeLatencyHistogram()
+        self.trace = IluminizeLatencyHistogram()
+        self.connects = 0
+        self.reconnects = 0
+        self.failures = {}
+        self.commands_sent = 0
+        self.bytes_sent = 0
+        self.repeats_sent = 0
+        self.repeats_cancelled = 0
+        self.last_success = None
+
+    @property
+    def failure_count(self):
+        return sum(self.failures.values())
+
+    @property
+    def bytes_per_command(self):
+        """Return the bytes on the wire per command, including redundant copies."""
+        if not self.commands_sent:
+            return None
+        return round(self.bytes_sent / self.commands_sent, 1)
+
+    def record_send(self, milliseconds, commands, payload_length):
+        self.send_latency.record(milliseconds)
+        self.commands_sent += commands
+        self.bytes_sent += payload_length
+        self.last_success = time.time()
+
+    def record_repeat(self, packets, payload_length):
+        self.repeats_sent += packets
+        self.bytes_sent += payload_length
+
+    def record_failure(self, errno=None):
+        key = str(errno) if errno is not None else "other"
+        self.failures[key] = self.failures.get(key, 0) + 1
+
+    def record_connect(self, milliseconds, reconnect):
+        self.connect_time.record(milliseconds)
+        self.connects += 1
+        if reconnect:
+            self.reconnects += 1
+
+    def as_dict(self):
+        return {
+            "send_latency_ms": self.send_latency.as_dict(),
+            "connect_time_ms": self.connect_time.as_dict(),
+            "trace_ms": self.trace.as_dict(),
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "failures": dict(self.failures),
+            "commands_sent": self.commands_sent,
+            "bytes_sent": self.bytes_sent,
+            "bytes_per_command": self.bytes_per_command,
+            "repeats_sent": self.repeats_sent,
+            "repeats_cancelled": self.repeats_cancelled,
+            "last_success": self.last_success,
+        }
@@ -0,0 +1,57 @@
+"""Bulk provisioning of Iluminize lights from YAML or CSV."""
+from __future__ import annotations
+
+import asyncio
+import csv
+import time
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.config_entries import SOURCE_IMPORT
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers.typing import ConfigType
+
+from .const import DOMAIN, LOGGER
+from .schema import LightSchema
+
+# entries are created this many at a time, so their setups and connections overlap
+_IMPORT_BATCH_SIZE = 16
+
+
+def read_csv(path: str) -> list[dict[str, str]]:
+    """Return the rows of a CSV file with a header row, leaving out empty cells."""
+    with open(path, newline="", encoding="utf-8") as file:
+        return [
+            {key.strip(): value.strip() for (key, value) in row.items() if key and value and value.strip()}
+            for row in csv.DictReader(file)
+        ]
+
+
+def validate_lights(rows: list[dict[str, Any]]) -> tuple[list[ConfigType], list[str]]:
+    """Validate every row against the light schema, returns the lights and the errors."""
+    lights = []
+    errors = []
+    for (index, row) in enumerate(rows, start=1):
+        try:
+            lights.append(LightSchema.ENTITY_SCHEMA(row))
+        except vol.Invalid as err:
+            errors.append(f"row {index}: {err}")
+    return (lights, errors)
+
+
+async def async_import_lights(hass: HomeAssistant, lights: list[ConfigType]) -> dict[str, Any]:
+    """Create a config entry for every light that is not configured yet."""
+    started = time.monotonic()
+    created = 0
+    for offset in range(0, len(lights), _IMPORT_BATCH_SIZE):
+        results = await asyncio.gather(*(
+            hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_IMPORT}, data=light)
+            for light in lights[offset:offset + _IMPORT_BATCH_SIZE]
+        ))
+        created += sum(1 for result in results if result["type"] == FlowResultType.CREATE_ENTRY)
+
+    elapsed = round((time.monotonic() - started) * 1000, 2)
+    LOGGER.debug("Imported %i of %i lights in %s ms", created, len(lights), elapsed)
+    return {"created": created, "skipped": len(lights) - created, "elapsed_ms": elapsed}
@@ -0,0 +1,62 @@
+"""State resync for Iluminize WiFi LED Controller."""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, LOGGER, EVENT_RESYNC
+
+
+class IluminizeResync(object):
+    """Pushes the state Home Assistant has for lights to the hardware.
+
+    All lights of one gateway go out in a single write and all gateways are
+    written concurrently, within the limits of the transport hub. Requests
+    made in the same event loop iteration are collected into one burst.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._requested = set()
+        self._task = None
+        self.last_report = None
+
+    @callback
+    def request(self, entity) -> None:
+        """Resync the light together with the others requested right now."""
+        self._requested.add(entity)
+        if self._task is None:
+            self._task = self._hass.async_create_background_task(self._async_run_requested(), f"{DOMAIN} resync")
+
+    async def _async_run_requested(self) -> None:
+        await asyncio.sleep(0)
+        (entities, self._requested, self._task) = (self._requested, set(), None)
+        await self.async_resync(entities)
+
+    async def async_resync(self, entities) -> dict[str, Any]:
+        """Write the state of the lights in one burst and report how long it took."""
+        started = time.monotonic()
+        lights = 0
+        by_gateway = defaultdict(list)
+        for entity in entities:
+            if entity.hass is None or not entity.resync_ready:
+                continue
+            lights += 1
+            by_gateway[entity.controller.gateway].extend(entity.resync_commands())
+
+        results = await asyncio.gather(*(gateway.async_write_commands(commands) for (gateway, commands) in by_gateway.items()))
+
+        report = {
+            "lights": lights,
+            "gateways": len(by_gateway),
+            "failed_gateways": [f"{gateway.host}:{gateway.port}" for (gateway, success) in zip(by_gateway, results) if not success],
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 2),
+        }
+        LOGGER.info("Resynced %i lights on %i gateways in %s ms", report["lights"], report["gateways"], report["elapsed_ms"])
+        self.last_report = report
+        self._hass.bus.async_fire(EVENT_RESYNC, report)
+        return report
@@ -0,0 +1,124 @@
+"""Diagnostic sensors for Iluminize WiFi LED Controller."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any
+
+from homeassistant import config_entries
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorEntityDescription, SensorStateClass
+from homeassistant.const import CONF_NAME, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, MANUFACTURER, MODEL, CONF_NAME_DEFAULT
+
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value, timezone.utc) if value is not None else None
+
+
+# (description, value of the controller, extra attributes of the controller)
+SENSORS = (
+    (
+        SensorEntityDescription(key="send_latency", name="Send latency", native_unit_of_measurement=UnitOfTime.MILLISECONDS, state_class=SensorStateClass.MEASUREMENT),
+        lambda controller: controller.metrics.send_latency.last,
+        lambda controller: controller.metrics.send_latency.as_dict(),
+    ),
+    (
+        SensorEntityDescription(key="connect_time", name="Connect time", native_unit_of_measurement=UnitOfTime.MILLISECONDS, state_class=SensorStateClass.MEASUREMENT),
+        lambda controller: controller.gateway.metrics.connect_time.last,
+        lambda controller: controller.gateway.metrics.connect_time.as_dict(),
+    ),
+    (
+        SensorEntityDescription(key="send_failures", name="Send failures", state_class=SensorStateClass.TOTAL_INCREASING),
+        lambda controller: controller.gateway.metrics.failure_count,
+        lambda controller: {"errno": dict(controller.gateway.metrics.failures)},
+    ),
+    (
+        SensorEntityDescription(key="reconnects", name="Reconnects", state_class=SensorStateClass.TOTAL_INCREASING),
+        lambda controller: controller.gateway.metrics.reconnects,
+        lambda controller: {"connects": controller.gateway.metrics.connects},
+    ),
+    (
+        SensorEntityDescription(key="bytes_sent", name="Bytes sent", native_unit_of_measurement=UnitOfInformation.BYTES, device_class=SensorDeviceClass.DATA_SIZE, state_class=SensorStateClass.TOTAL_INCREASING),
+        lambda controller: controller.metrics.bytes_sent,
+        lambda controller: {"commands_sent": controller.metrics.commands_sent},
+    ),
+    (
+        SensorEntityDescription(key="bytes_per_command", name="Bytes per command", native_unit_of_measurement=UnitOfInformation.BYTES, device_class=SensorDeviceClass.DATA_SIZE, state_class=SensorStateClass.MEASUREMENT),
+        lambda controller: controller.metrics.bytes_per_command,
+        lambda controller: {"redundancy": controller.gateway.redundancy, "repeats_sent": controller.metrics.repeats_sent, "repeats_cancelled": controller.metrics.repeats_cancelled},
+    ),
+    (
+        SensorEntityDescription(key="queue_depth", name="Queue depth", state_class=SensorStateClass.MEASUREMENT),
+        lambda controller: controller.queue_depth,
+        lambda controller: controller.stats,
+    ),
+    (
+        SensorEntityDescription(key="last_success", name="Last success", device_class=SensorDeviceClass.TIMESTAMP),
+        lambda controller: _timestamp(controller.metrics.last_success),
+        None,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: config_entries.ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Iluminize diagnostic sensors."""
+    device_name = config_entry.data.get(CONF_NAME, CONF_NAME_DEFAULT)
+    controller = hass.data[DOMAIN][config_entry.entry_id]
+
+    async_add_entities(
+        [IluminizeMetricSensor(device_name, controller, *sensor) for sensor in SENSORS]
+    )
+
+
+class IluminizeMetricSensor(SensorEntity):
+    """Diagnostic sensor exposing a metric of the Iluminize controller."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_has_entity_name = True
+
+    def __init__(self, device_name, controller, description, value_fn, attributes_fn):
+        """Initialise the sensor.
+
+        :param device_name: Name for this device to use.
+        :param controller: Instance of the Iluminize controller.
+        :param description: Entity description of the metric.
+        :param value_fn: Returns the state from the controller.
+        :param attributes_fn: Returns extra state attributes from the controller, or None.
+        """
+        self.entity_description = description
+        self._attr_unique_id = f"{DOMAIN}_{controller.host}_{controller.port}_{controller.sender.lower()}_{description.key}"
+        self._device_name = device_name
+        self._controller = controller
+        self._value_fn = value_fn
+        self._attributes_fn = attributes_fn
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info."""
+        return DeviceInfo(
+            identifiers={
+                (DOMAIN, f"{self._controller.host}:{self._controller.port}:{self._controller.sender.lower()}")
+            },
+            name=self._device_name,
+            manufacturer=MANUFACTURER,
+            model=MODEL,
+        )
+
+    @property
+    def native_value(self) -> Any:
+        """Return the current metric value."""
+        return self._value_fn(self._controller)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return details of the metric."""
+        if self._attributes_fn is None:
+            return None
+        return self._attributes_fn(self._controller)
@@ -0,0 +1,233 @@
+"""Services for the Iluminize integration."""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+import csv
+import os
+
+import voluptuous as vol
+
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_RGB_COLOR, ATTR_RGBW_COLOR
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_STATE
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+
+from .const import DOMAIN, LOGGER, DATA_ENTITIES, DATA_SHOW, DATA_RESYNC, FILES_DIRECTORY, SERVICE_APPLY_SCENE, SERVICE_IMPORT_LIGHTS, SERVICE_RESYNC, SERVICE_RECORD_SHOW, SERVICE_PLAY_SHOW, SERVICE_STOP_SHOW, ATTR_TARGETS, ATTR_MAX_CONCURRENCY, ATTR_FILENAME, ATTR_DURATION, DEFAULT_MAX_CONCURRENCY
+from .controller import IluminizeController
+from .provisioning import async_import_lights, read_csv, validate_lights
+from .show import IluminizeShow, IluminizeShowRecorder, async_play_show, show_key
+
+# records are written to disk in chunks, so long recordings stay small in memory
+_RECORD_FLUSH_INTERVAL = 5
+
+SCENE_VALUES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_STATE, default=True): cv.boolean,
+        vol.Optional(ATTR_BRIGHTNESS): vol.All(vol.Coerce(int), vol.Range(min=0, max=255)),
+        vol.Optional(ATTR_RGB_COLOR): vol.All(
+            vol.Coerce(tuple), vol.ExactSequence((cv.byte, cv.byte, cv.byte))
+        ),
+        vol.Optional(ATTR_RGBW_COLOR): vol.All(
+            vol.Coerce(tuple), vol.ExactSequence((cv.byte, cv.byte, cv.byte, cv.byte))
+        ),
+    }
+)
+
+APPLY_SCENE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_TARGETS): {cv.entity_id: SCENE_VALUES_SCHEMA},
+        vol.Optional(ATTR_MAX_CONCURRENCY, default=DEFAULT_MAX_CONCURRENCY): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
+FILENAME = vol.All(cv.string, vol.Match(r"^[\w.-]+$"))
+
+RECORD_SHOW_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_FILENAME): FILENAME,
+        vol.Optional(ATTR_DURATION): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+
+PLAY_SHOW_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_FILENAME): FILENAME,
+    }
+)
+
+RESYNC_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+    }
+)
+
+IMPORT_LIGHTS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_FILENAME): FILENAME,
+    }
+)
+
+
+def _file_path(hass: HomeAssistant, filename: str) -> str:
+    return hass.config.path(FILES_DIRECTORY, filename)
+
+
+def _controllers(hass: HomeAssistant) -> list[IluminizeController]:
+    return [value for value in hass.data[DOMAIN].values() if isinstance(value, IluminizeController)]
+
+
+def _start_show(hass: HomeAssistant, coro, name: str) -> None:
+    """Run the show task, stopping the one that is running."""
+    _stop_show(hass)
+    hass.data[DOMAIN][DATA_SHOW] = hass.async_create_background_task(coro, name)
+
+
+def _stop_show(hass: HomeAssistant) -> None:
+    task = hass.data[DOMAIN].pop(DATA_SHOW, None)
+    if task is not None:
+        task.cancel()
+
+
+async def _async_record(hass: HomeAssistant, recorder: IluminizeShowRecorder, duration: float | None) -> None:
+    loop = asyncio.get_running_loop()
+    stop_at = None if duration is None else loop.time() + duration
+    recorder.start()
+    try:
+        while stop_at is None or loop.time() < stop_at:
+            timeout = _RECORD_FLUSH_INTERVAL if stop_at is None else min(_RECORD_FLUSH_INTERVAL, stop_at - loop.time())
+            await asyncio.sleep(max(0, timeout))
+            await hass.async_add_executor_job(recorder.write, recorder.take())
+    finally:
+        recorder.stop()
+        await hass.async_add_executor_job(recorder.close, recorder.take())
+        LOGGER.debug("Recorded %i frames of %i controllers", recorder.frame_count, len(recorder.keys))
+
+
+async def _async_play(show: IluminizeShow, controllers: list[IluminizeController | None]) -> None:
+    try:
+        await async_play_show(show, controllers)
+    finally:
+        show.close()
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Iluminize services."""
+
+    async def async_apply_scene(call: ServiceCall) -> ServiceResponse:
+        """Encode every target up front and write them concurrently per gateway."""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        entities = hass.data[DOMAIN][DATA_ENTITIES]
+
+        results = {}
+        by_gateway = defaultdict(list)
+        for (entity_id, values) in call.data[ATTR_TARGETS].items():
+            entity = entities.get(entity_id)
+            if entity is None:
+                LOGGER.warning("Scene target %s is not an Iluminize light", entity_id)
+                results[entity_id] = {"success": False, "latency_ms": None}
+                continue
+            commands = entity.scene_commands(values)
+            by_gateway[entity.controller.gateway].append((entity, commands))
+
+        semaphore = asyncio.Semaphore(call.data[ATTR_MAX_CONCURRENCY])
+
+        async def async_write(gateway, targets):
+            async with semaphore:
+                success = await gateway.async_write_commands([command for (_, commands) in targets for command in commands])
+            latency = round((loop.time() - started) * 1000, 2)
+            for (entity, _) in targets:
+                results[entity.entity_id] = {"success": success, "latency_ms": latency}
+                entity.async_write_ha_state()
+
+        await asyncio.gather(*(async_write(gateway, targets) for (gateway, targets) in by_gateway.items()))
+
+        latency = round((loop.time() - started) * 1000, 2)
+        LOGGER.debug("Applied scene to %i targets in %s ms", len(results), latency)
+        return {"latency_ms": latency, ATTR_TARGETS: results}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_APPLY_SCENE,
+        async_apply_scene,
+        schema=APPLY_SCENE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_resync(call: ServiceCall) -> ServiceResponse:
+        """Send the state of the lights to the hardware in one burst."""
+        entities = hass.data[DOMAIN][DATA_ENTITIES]
+        if ATTR_ENTITY_ID in call.data:
+            targets = [entities[entity_id] for entity_id in call.data[ATTR_ENTITY_ID] if entity_id in entities]
+        else:
+            targets = list(entities.values())
+        return await hass.data[DOMAIN][DATA_RESYNC].async_resync(targets)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_RESYNC,
+        async_resync,
+        schema=RESYNC_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_import_lights_service(call: ServiceCall) -> ServiceResponse:
+        """Create config entries for all lights of a CSV file, if every row is valid."""
+        path = _file_path(hass, call.data[ATTR_FILENAME])
+        try:
+            rows = await hass.async_add_executor_job(read_csv, path)
+        except (OSError, UnicodeDecodeError, csv.Error) as err:
+            raise HomeAssistantError(f"Cannot read {call.data[ATTR_FILENAME]}: {err}") from err
+
+        (lights, errors) = validate_lights(rows)
+        if errors:
+            raise HomeAssistantError(f"Invalid lights in {call.data[ATTR_FILENAME]}: {'; '.join(errors)}")
+        return await async_import_lights(hass, lights)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_LIGHTS,
+        async_import_lights_service,
+        schema=IMPORT_LIGHTS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_record_show(call: ServiceCall) -> None:
+        """Record what the controllers send into a show file."""
+        path = _file_path(hass, call.data[ATTR_FILENAME])
+        recorder = IluminizeShowRecorder(_controllers(hass))
+
+        def open_file() -> None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            recorder.open(path)
+
+        await hass.async_add_executor_job(open_file)
+        _start_show(hass, _async_record(hass, recorder, call.data.get(ATTR_DURATION)), f"{DOMAIN} record {call.data[ATTR_FILENAME]}")
+
+    async def async_play_show_service(call: ServiceCall) -> None:
+        """Play a recorded show file."""
+        path = _file_path(hass, call.data[ATTR_FILENAME])
+        try:
+            show = await hass.async_add_executor_job(IluminizeShow, path)
+        except (OSError, ValueError) as err:
+            raise HomeAssistantError(f"Cannot play show {call.data[ATTR_FILENAME]}: {err}") from err
+
+        by_key = {show_key(controller): controller for controller in _controllers(hass)}
+        controllers = [by_key.get(key) for key in show.keys]
+        for (key, controller) in zip(show.keys, controllers):
+            if controller is None:
+                LOGGER.warning("Show %s controls %s, which is not configured", call.data[ATTR_FILENAME], key)
+        LOGGER.debug("Playing %i frames over %.1f s", show.frame_count, show.duration)
+        _start_show(hass, _async_play(show, controllers), f"{DOMAIN} play {call.data[ATTR_FILENAME]}")
+
+    @callback
+    def async_stop_show(call: ServiceCall) -> None:
+        """Stop the show that is being recorded or played."""
+        _stop_show(hass)
+
+    hass.services.async_register(DOMAIN, SERVICE_RECORD_SHOW, async_record_show, schema=RECORD_SHOW_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_PLAY_SHOW, async_play_show_service, schema=PLAY_SHOW_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_STOP_SHOW, async_stop_show)
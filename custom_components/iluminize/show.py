@@ -0,0 +1,158 @@
+"""Recording and playback of light shows for Iluminize WiFi LED Controller.
+
+A show file starts with a header holding the magic ``ILSH``, the format
+version and the keys (``host:port:sender``) of the recorded controllers.
+It is followed by fixed size records of the milliseconds since the start,
+the controller index, the channel and three value bytes, ordered by time.
+"""
+
+import asyncio
+import mmap
+import struct
+import time
+from struct import Struct
+
+from .controller import PRIORITY_BACKGROUND
+from .encoder import CHANNEL_RGB, CHANNEL_WHITE, packet_values
+
+SHOW_MAGIC = b"ILSH"
+SHOW_VERSION = 1
+
+_HEADER = Struct("<4sBH")
+_KEY_LENGTH = Struct("<B")
+_RECORD = Struct("<IHB3s")
+_CHANNELS = (CHANNEL_RGB, CHANNEL_WHITE)
+
+
+def show_key(controller):
+    """Return the key identifying the controller in a show file."""
+    return f"{controller.host}:{controller.port}:{controller.sender.lower()}"
+
+
+class IluminizeShowRecorder(object):
+    """Captures the commands controllers deliver as frames of a show.
+
+    Records are buffered in memory by the event loop and handed out with
+    ``take``, so the blocking ``write`` can run in an executor.
+    """
+
+    def __init__(self, controllers):
+        self.controllers = list(controllers)
+        self.keys = [show_key(controller) for controller in self.controllers]
+        self.frame_count = 0
+        self._indices = {id(controller): index for (index, controller) in enumerate(self.controllers)}
+        self._buffer = bytearray()
+        self._started = None
+        self._file = None
+
+    def open(self, path):
+        """Create the show file and write its header."""
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(SHOW_MAGIC, SHOW_VERSION, len(self.keys)))
+        for key in self.keys:
+            encoded = key.encode()
+            self._file.write(_KEY_LENGTH.pack(len(encoded)) + encoded)
+
+    def start(self):
+        self._started = time.monotonic()
+        for controller in self.controllers:
+            controller.recorder = self
+
+    def stop(self):
+        for controller in self.controllers:
+            if controller.recorder is self:
+                controller.recorder = None
+
+    def record(self, controller, channel, packet):
+        """Append the packet of the channel as a frame, called by the controller."""
+        values = bytes(packet_values(channel, packet)).ljust(3, b"\x00")
+        elapsed = round((time.monotonic() - self._started) * 1000)
+        self._buffer += _RECORD.pack(elapsed, self._indices[id(controller)], _CHANNELS.index(channel), values)
+        self.frame_count += 1
+
+    def take(self):
+        """Return the records buffered since the last call."""
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def write(self, data):
+        self._file.write(data)
+
+    def close(self, data=b""):
+        """Write the remaining records and close the file."""
+        if self._file is None:
+            return
+        self._file.write(data)
+        self._file.close()
+        self._file = None
+
+
+class IluminizeShow(object):
+    """Show file mapped into memory, frames are decoded only while they play."""
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, key_count) = _HEADER.unpack_from(self._map, 0)
+            if magic != SHOW_MAGIC or version != SHOW_VERSION:
+                raise ValueError(f"{path} is not an Iluminize show")
+            offset = _HEADER.size
+            self.keys = []
+            for _ in range(key_count):
+                (length,) = _KEY_LENGTH.unpack_from(self._map, offset)
+                offset += _KEY_LENGTH.size
+                if offset + length > len(self._map):
+                    raise ValueError(f"{path} is truncated")
+                self.keys.append(bytes(self._map[offset:offset + length]).decode())
+                offset += length
+        except struct.error as err:
+            self._map.close()
+            raise ValueError(f"{path} is truncated") from err
+        except Exception:
+            self._map.close()
+            raise
+        self._offset = offset
+        self.frame_count = (len(self._map) - offset) // _RECORD.size
+
+    @property
+    def duration(self):
+        """Return the time of the last frame in seconds."""
+        if not self.frame_count:
+            return 0.0
+        return self._frame(self.frame_count - 1)[0] / 1000
+
+    def frames(self):
+        """Yield ``(milliseconds, controller index, channel, values)`` frames in order."""
+        for index in range(self.frame_count):
+            (elapsed, controller, channel, values) = self._frame(index)
+            yield (elapsed, controller, _CHANNELS[channel], values)
+
+    def close(self):
+        self._map.close()
+
+    def _frame(self, index):
+        return _RECORD.unpack_from(self._map, self._offset + index * _RECORD.size)
+
+
+async def async_play_show(show, controllers):
+    """Queue the frames of the show on the controllers at their recorded time.
+
+    ``controllers`` is aligned with ``show.keys``, frames of a missing
+    controller are skipped. Deadlines are absolute; frames that are late are
+    queued anyway and collapse into the newest one in the controller queue.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for (elapsed, index, channel, values) in show.frames():
+        delay = start + elapsed / 1000 - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        controller = controllers[index]
+        if controller is None:
+            continue
+        if channel == CHANNEL_RGB:
+            controller.queue_rgb(*values, priority=PRIORITY_BACKGROUND)
+        else:
+            controller.queue_white(values[0], priority=PRIORITY_BACKGROUND)
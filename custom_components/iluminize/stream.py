@@ -0,0 +1,70 @@
+"""Frame stream input for Iluminize WiFi LED Controller.
+
+Datagrams carry raw RGB frames like those of Hyperion's UDP raw devices,
+three bytes per target in the configured order of the targets.
+"""
+
+import asyncio
+import logging
+
+LOGGER = logging.getLogger("iluminize")
+
+_RGB_LENGTH = 3
+
+
+class IluminizeStreamProtocol(asyncio.DatagramProtocol):
+    """Passes every RGB value of a received frame to ``send(index, red, green, blue)``.
+
+    Frames are handed on as they arrive. The controllers only keep the
+    newest command per channel, so frames they cannot send in time are
+    dropped instead of building up latency.
+    """
+
+    def __init__(self, target_count, send):
+        self.target_count = target_count
+        self.frames = 0
+        self.invalid = 0
+        self._send = send
+        self._transport = None
+
+    @property
+    def address(self):
+        """Return the address the input listens on."""
+        return self._transport.get_extra_info("sockname")
+
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def datagram_received(self, data, addr):
+        if not data or len(data) % _RGB_LENGTH:
+            self.invalid += 1
+            return
+        self.frames += 1
+        send = self._send
+        for index in range(min(self.target_count, len(data) // _RGB_LENGTH)):
+            offset = index * _RGB_LENGTH
+            send(index, data[offset], data[offset + 1], data[offset + 2])
+
+    def error_received(self, exc):
+        LOGGER.debug("Stream input error: %s", exc)
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def as_dict(self):
+        return {
+            "targets": self.target_count,
+            "frames": self.frames,
+            "invalid": self.invalid,
+        }
+
+
+async def async_start_stream(host, port, target_count, send):
+    """Listen for frames on the UDP port, returns the protocol."""
+    loop = asyncio.get_running_loop()
+    (_, protocol) = await loop.create_datagram_endpoint(
+        lambda: IluminizeStreamProtocol(target_count, send), local_addr=(host, port)
+    )
+    return protocol
@@ -0,0 +1,48 @@
+"""Frame pacing and fades for Iluminize WiFi LED Controller."""
+
+import asyncio
+
+
+class IluminizeFade(object):
+    """Linear fade between two sets of output values."""
+
+    def __init__(self, start, target, duration, fps):
+        self.start = tuple(start)
+        self.target = tuple(target)
+        self.frame_count = max(1, round(duration * fps))
+
+    def frame(self, index):
+        """Return the output values of the given frame, the last one is the target."""
+        if index >= self.frame_count - 1:
+            return self.target
+        progress = (index + 1) / self.frame_count
+        return tuple(
+            round(start + (target - start) * progress)
+            for (start, target) in zip(self.start, self.target)
+        )
+
+
+async def async_play_frames(frame_at, frame_count, fps, send):
+    """Pass ``frame_at(index)`` to ``send`` for every frame at a fixed rate.
+
+    Frame deadlines are absolute, so timing does not drift when the event
+    loop is busy; frames whose deadline already passed are skipped in favour
+    of the one that is due. The last frame is always sent. Returns whatever
+    ``send`` returned for the last frame. With a ``frame_count`` of None the
+    frames play until the task is cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    interval = 1 / fps
+    start = loop.time()
+    index = 0
+
+    while True:
+        result = send(frame_at(index))
+        if frame_count is not None and index >= frame_count - 1:
+            return result
+
+        next_index = index + 1
+        await asyncio.sleep(max(0, start + next_index * interval - loop.time()))
+        index = max(next_index, int((loop.time() - start) * fps))
+        if frame_count is not None:
+            index = min(frame_count - 1, index)